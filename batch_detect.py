@@ -0,0 +1,100 @@
+"""Headless batch detection: runs a YOLO model with BoT-SORT tracking over videos
+and writes one <video>_annotations.csv per video (same columns as the GUI export).
+
+    python batch_detect.py model.pt dive01.mp4 /media/cruise/day3 -o results --batch 16
+    python batch_detect.py model.pt /media/cruise -o results --workers 8 --pin-cpus
+"""
+import argparse
+import os
+import sys
+import time
+import torch
+from ultralytics import YOLO
+from modulos.batch_pipeline import find_videos, process_video
+from modulos.job_scheduler import JobState, STATE_FILE, run_jobs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="iSEA headless batch detection")
+    parser.add_argument("model", help="YOLO weights (.pt)")
+    parser.add_argument("inputs", nargs="+", help="video files or folders of videos")
+    parser.add_argument("-o", "--output", default="batch_results", help="output folder")
+    parser.add_argument("--batch", type=int, default=8, help="frames per inference batch")
+    parser.add_argument("--stride", type=int, default=1, help="process every Nth frame")
+    parser.add_argument("--conf", type=float, default=0.5, help="confidence threshold")
+    parser.add_argument("--device", default=None, help="cpu, cuda, cuda:0... (default: cuda if available)")
+    parser.add_argument("--no-frames", action="store_true", help="do not save the frame of each detection")
+    parser.add_argument("--all-detections", action="store_true",
+                        help="also write every detection of every frame to <video>_detections.csv")
+    parser.add_argument("--overwrite", action="store_true", help="reprocess videos already marked as done")
+    parser.add_argument("--workers", type=int, default=1, help="videos processed in parallel, one process each")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch/OpenCV threads per worker (default: CPU count / workers)")
+    parser.add_argument("--pin-cpus", action="store_true", help="pin each worker to its own CPU cores")
+    return parser.parse_args(argv)
+
+
+def print_progress(video_name):
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.perf_counter()
+        if now - last[0] >= 5 or done >= total:
+            last[0] = now
+            percent = f" ({100 * done / total:.0f}%)" if total else ""
+            print(f"  {video_name}: {done}/{total} frames{percent}", flush=True)
+    return progress
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No videos to process")
+        return 1
+
+    device = args.device or ('cuda' if torch.cuda.is_available() else 'cpu')
+    frames_dir = None if args.no_frames else os.path.join(args.output, "frames")
+    options = dict(batch_size=args.batch, stride=args.stride, conf=args.conf, device=device,
+                   save_frames_dir=frames_dir, all_detections_csv=args.all_detections)
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        state = run_jobs(args.model, videos, args.output, args.workers,
+                         threads_per_worker=args.threads_per_worker, pin_cpus=args.pin_cpus,
+                         overwrite=args.overwrite, **options)
+        total_frames = sum(job.get("stats", {}).get("inferred", 0) for path, job in state.jobs.items()
+                           if path in videos and job.get("status") == "done")
+        elapsed = time.perf_counter() - start
+        print(f"Done: {total_frames} frames in {elapsed:.1f} s ({total_frames / max(elapsed, 1e-9):.1f} fps)")
+        return 0
+
+    os.makedirs(args.output, exist_ok=True)
+    state = JobState(os.path.join(args.output, STATE_FILE))
+    model = YOLO(args.model)
+    total_frames = 0
+    for i, video_path in enumerate(videos, 1):
+        name = os.path.basename(video_path)
+        if not args.overwrite and state.is_done(video_path):
+            print(f"[{i}/{len(videos)}] {name}: already processed, skipping")
+            continue
+        print(f"[{i}/{len(videos)}] {name}")
+        state.set(video_path, "running")
+        try:
+            stats = process_video(model, video_path, args.output, progress=print_progress(name), **options)
+        except Exception as e:
+            state.set(video_path, "failed", error=str(e))
+            print(f"  {name}: failed: {e}")
+            continue
+        state.set(video_path, "done", stats=stats)
+        total_frames += stats["inferred"]
+        print(f"  {name}: {stats['inferred']} frames, {stats['detections']} detections, "
+              f"{stats['fps']:.1f} fps ({stats['inference_fps']:.1f} fps inference)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {total_frames} frames in {elapsed:.1f} s ({total_frames / max(elapsed, 1e-9):.1f} fps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 import sys
 import os
 from PyQt6.QtWidgets import QApplication
-from modulos.video_annotator import VideoAnnotator
+from PyQt6.QtCore import QTimer
+from modulos.startup_profiler import profiler
 
 def resource_path(relative_path):
     """Obtém caminho correto para arquivos no executável"""
@@ -12,7 +13,26 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path).replace("/", os.sep)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = VideoAnnotator()
-    window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    # --profile-startup: prints import and widget construction times once the window is up
+    profile_startup = "--profile-startup" in sys.argv
+    if profile_startup:
+        sys.argv.remove("--profile-startup")
+        profiler.start()
+
+    with profiler.section("import modulos.video_annotator"):
+        from modulos.video_annotator import VideoAnnotator
+
+    with profiler.section("QApplication"):
+        app = QApplication(sys.argv)
+    with profiler.section("VideoAnnotator"):
+        window = VideoAnnotator()
+    with profiler.section("show"):
+        window.show()
+
+    if profile_startup:
+        def report():
+            profiler.stop()
+            profiler.report()
+        # runs on the first pass of the event loop, after the window is painted
+        QTimer.singleShot(0, report)
+    sys.exit(app.exec())
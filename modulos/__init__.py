@@ -1,7 +1,19 @@
-from .video_label import VideoLabel
-from .detections_dock import DetectionsDockWidget
-from .train_thread import TrainThread
-from .video_annotator import VideoAnnotator
+import importlib
 
 __all__ = ['VideoLabel', 'DetectionsDockWidget', 'TrainThread', 'VideoAnnotator']
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+# the classes are imported on first access, so importing a small module of the
+# package (e.g. for the startup profiler or the batch CLI) does not load the GUI
+_exports = {
+    'VideoLabel': '.video_label',
+    'DetectionsDockWidget': '.detections_dock',
+    'TrainThread': '.train_thread',
+    'VideoAnnotator': '.video_annotator',
+}
+
+
+def __getattr__(name):
+    if name in _exports:
+        return getattr(importlib.import_module(_exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
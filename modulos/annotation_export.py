@@ -0,0 +1,61 @@
+import csv
+import os
+
+# columns of the annotations CSV, shared by the GUI export and the batch pipeline
+CSV_FIELDNAMES = ["Video", "Timestamp", "Taxon", "Confidence", "Type", "Track_ID",
+                  "x1", "y1", "x2", "y2", "Frame_Number", "Photo"]
+
+
+def format_timestamp(frame_num, fps):
+    """Video position of a frame as HH:MM:SS"""
+    if not fps or fps <= 0:
+        return "00:00:00"
+    total_seconds = frame_num / fps
+    hours = int(total_seconds // 3600)
+    minutes = int((total_seconds % 3600) // 60)
+    seconds = int(total_seconds % 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def best_by_track(detections):
+    """Keeps the highest confidence detection per track_id, untracked ones are all kept"""
+    best = {}
+    for d in detections:
+        tid = d.get("track_id")
+        if tid is not None:
+            if tid not in best or d.get("confidence", 0) > best[tid].get("confidence", 0):
+                best[tid] = d
+        else:
+            best[f"manual_{d.get('frame_number', 0)}_{id(d)}"] = d
+    return best
+
+
+def csv_row(ann):
+    """Row of the annotations CSV for one detection dict"""
+    video_path = ann.get("video_path", "")
+    video_name = "Live" if video_path == "Live" else os.path.basename(str(video_path)) if video_path else "Unknown"
+
+    confidence = ann.get('confidence', 0)
+    confidence_str = f"{confidence:.2f}" if isinstance(confidence, (int, float)) else str(confidence)
+
+    return {
+        "Video": video_name,
+        "Timestamp": ann.get("timestamp", ""),
+        "Taxon": ann.get("class", "Unknown"),
+        "Confidence": confidence_str,
+        "Type": ann.get("type", "unknown"),
+        "Track_ID": ann.get("track_id", ""),
+        "x1": ann.get("x1", ""),
+        "y1": ann.get("y1", ""),
+        "x2": ann.get("x2", ""),
+        "y2": ann.get("y2", ""),
+        "Frame_Number": ann.get("frame_number", ""),
+        "Photo": ann.get("frame_path", "")
+    }
+
+
+def write_csv(output_path, detections):
+    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(csv_row(ann) for ann in detections)
@@ -0,0 +1,246 @@
+"""Headless detection + tracking over whole videos, without the GUI.
+
+Three stages connected by bounded queues: a decoder thread, batched YOLO/BoT-SORT
+inference in the calling thread and a writer thread that builds the detections"""
+import csv
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import cv2
+from .annotation_export import format_timestamp, write_csv, CSV_FIELDNAMES, csv_row
+from .keyframe_index import KeyframeIndex, seek_capture
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".m4v")
+_END = object()  # end-of-stream marker passed down the queues
+
+
+def find_videos(paths):
+    """Video files from a list of files and folders (folders are not searched recursively)"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            videos += sorted(str(p) for p in Path(path).iterdir()
+                             if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+        elif os.path.isfile(path):
+            videos.append(str(path))
+        else:
+            print(f"Not found: {path}")
+    return videos
+
+
+def output_path_for(video_path, output_dir):
+    """Same name the GUI suggests when saving annotations"""
+    return os.path.join(output_dir, f"{Path(video_path).stem}_annotations.csv")
+
+
+def reset_tracker(model):
+    """Starts the BoT-SORT state (and track ids) over for a new video"""
+    predictor = getattr(model, "predictor", None)
+    for tracker in getattr(predictor, "trackers", None) or []:
+        tracker.reset()
+
+
+class PipelineStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.decoded = 0
+        self.inferred = 0
+        self.detections = 0
+        self.batches = 0
+        self.inference_s = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_dict(self):
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "decoded": self.decoded,
+            "inferred": self.inferred,
+            "detections": self.detections,
+            "elapsed_s": round(elapsed, 2),
+            "fps": round(self.inferred / elapsed, 2),
+            "inference_fps": round(self.inferred / self.inference_s, 2) if self.inference_s else 0.0,
+        }
+
+
+def _decode(video_path, frames_q, stride, stats, stop):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frame_num = 0
+        while not stop.is_set():
+            if frame_num % stride:
+                # skipped frames are only demuxed, not converted
+                if not cap.grab():
+                    break
+                frame_num += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            stats.decoded += 1
+            frames_q.put((frame_num, frame))
+            frame_num += 1
+    finally:
+        cap.release()
+        frames_q.put(_END)
+
+
+def _write(results_q, context, best, all_writer, stats):
+    """Builds the detection dicts, keeping only the best one per track in best"""
+    names, video_path, fps = context
+    while True:
+        item = results_q.get()
+        if item is _END:
+            break
+        frame_num, (h, w), boxes, classes, confidences, track_ids = item
+        timestamp = format_timestamp(frame_num, fps)
+        try:
+            for (x1, y1, x2, y2), cls_id, conf, track_id in zip(boxes, classes, confidences, track_ids):
+                label = names[int(cls_id)]
+                detection = {
+                    "x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2),
+                    "label": label,
+                    "confidence": float(conf),
+                    "type": "auto",
+                    "class": label,
+                    "timestamp": timestamp,
+                    "track_id": int(track_id) if track_id is not None else None,
+                    "frame_number": frame_num,
+                    "video_path": video_path,
+                    "frame_dimensions": f"{w}x{h}",
+                    "frame_source": (video_path, frame_num),
+                }
+                key = detection["track_id"] if detection["track_id"] is not None else \
+                    f"manual_{frame_num}_{id(detection)}"
+                if key not in best or detection["confidence"] > best[key]["confidence"]:
+                    best[key] = detection
+                if all_writer is not None:
+                    all_writer.writerow(csv_row(detection))
+                stats.detections += 1
+        except Exception as e:
+            # keeps draining the queue so inference never blocks on it
+            print(f"Writer error on frame {frame_num}: {e}")
+
+
+def _result_arrays(result):
+    """Plain arrays out of an ultralytics Results, so nothing holds GPU tensors downstream"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return [], [], [], []
+    ids = boxes.id.int().tolist() if boxes.id is not None else [None] * len(boxes)
+    return boxes.xyxy.tolist(), boxes.cls.int().tolist(), boxes.conf.tolist(), ids
+
+
+def save_frames(detections, frames_dir):
+    """Writes the frame of each detection, decoding forward in frame order"""
+    os.makedirs(frames_dir, exist_ok=True)
+    by_video = {}
+    for ann in detections:
+        by_video.setdefault(ann["video_path"], set()).add(ann["frame_number"])
+
+    saved = {}
+    for video_path, frame_nums in by_video.items():
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Could not open {video_path}, its frames are not saved")
+            continue
+        index = KeyframeIndex.load(video_path)
+        for frame_num in sorted(frame_nums):
+            frame_path = Path(frames_dir) / f"{Path(video_path).stem}_frame_{frame_num:06d}.jpg"
+            if not frame_path.exists():
+                seek_capture(cap, frame_num, index)
+                ret, frame = cap.read()
+                if ret:
+                    cv2.imwrite(str(frame_path), frame)
+            saved[(video_path, frame_num)] = str(frame_path)
+        cap.release()
+
+    for ann in detections:
+        ann["frame_path"] = saved.get((ann["video_path"], ann["frame_number"]), "")
+
+
+def process_video(model, video_path, output_dir, batch_size=8, stride=1, conf=0.5, device=None,
+                  save_frames_dir=None, all_detections_csv=False, tracker="botsort.yaml",
+                  queue_size=None, progress=None):
+    """Runs detection and tracking over one video and writes <video>_annotations.csv.
+
+    progress(frames_done, total_frames) is called after every batch. Returns the stats dict"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    # frames with frame_num % stride == 0, as _decode emits them
+    total_frames = -(-int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) // max(stride, 1))
+    cap.release()
+
+    os.makedirs(output_dir, exist_ok=True)
+    stats = PipelineStats()
+    stop = threading.Event()
+    frames_q = queue.Queue(maxsize=queue_size or 4 * batch_size)
+    results_q = queue.Queue(maxsize=queue_size or 4 * batch_size)
+    best = {}  # same grouping as annotation_export.best_by_track, built while streaming
+
+    all_file = None
+    all_writer = None
+    if all_detections_csv:
+        all_file = open(os.path.join(output_dir, f"{Path(video_path).stem}_detections.csv"),
+                        'w', newline='', encoding='utf-8')
+        all_writer = csv.DictWriter(all_file, fieldnames=CSV_FIELDNAMES)
+        all_writer.writeheader()
+
+    decoder = threading.Thread(target=_decode, args=(video_path, frames_q, max(stride, 1), stats, stop),
+                               daemon=True)
+    writer = threading.Thread(target=_write, args=(results_q, (model.names, video_path, fps),
+                                                   best, all_writer, stats), daemon=True)
+    decoder.start()
+    writer.start()
+
+    reset_tracker(model)
+    try:
+        finished = False
+        while not finished:
+            batch = []
+            while len(batch) < batch_size:
+                item = frames_q.get()
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                break
+
+            start = time.perf_counter()
+            frames = [frame for _, frame in batch]
+            # the list is inferred as one batch, BoT-SORT is updated frame by frame in order
+            results = model.track(frames, persist=True, verbose=False, conf=conf,
+                                  device=device, tracker=tracker)
+            stats.inference_s += time.perf_counter() - start
+            stats.inferred += len(batch)
+            stats.batches += 1
+
+            for (frame_num, frame), result in zip(batch, results):
+                results_q.put((frame_num, frame.shape[:2]) + tuple(_result_arrays(result)))
+            if progress is not None:
+                progress(stats.inferred, total_frames)
+    finally:
+        stop.set()
+        # unblocks the decoder if it is waiting on a full queue
+        while decoder.is_alive():
+            try:
+                frames_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        results_q.put(_END)
+        writer.join()
+        if all_file is not None:
+            all_file.close()
+
+    best = list(best.values())
+    if save_frames_dir:
+        save_frames(best, save_frames_dir)
+    write_csv(output_path_for(video_path, output_dir), best)
+    return stats.as_dict()
@@ -0,0 +1,118 @@
+from bisect import bisect_left
+import os
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+
+
+def detection_text(detection):
+    """One line description of a detection as shown in the history"""
+    class_name = detection.get("class", "Desconhecido")
+    confidence = detection.get("confidence", 0)
+    timestamp = detection.get("timestamp", "")
+    track_id = detection.get("track_id")
+
+    text = f"{timestamp} - {class_name}" if timestamp else class_name
+    if detection.get("type") == "manual":
+        text += " (manual)"
+    else:
+        text += f" ({confidence:.2f})" if confidence else ""
+        if track_id is not None:
+            text += f" (ID: {track_id})"
+    return text
+
+
+class DetectionHistoryModel(QAbstractListModel):
+    """List model over a time-ordered list of (time_s, row) keys of a DetectionTable.
+
+    Nothing is stored per visible item, text is built from the table only when the view asks for it"""
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.order = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.order):
+            return None
+        row = self.order[index.row()][1]
+        if role == Qt.ItemDataRole.UserRole:
+            return row
+        if role == Qt.ItemDataRole.DisplayRole:
+            return detection_text(self.table.row(row))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            video_path = self.table.videos[int(self.table.columns["video_id"][row])]
+            return os.path.basename(str(video_path or "Live"))
+        return None
+
+    def set_order(self, order):
+        """Shows another ordered list (the list object is shared, not copied)"""
+        self.beginResetModel()
+        self.order = order
+        self.endResetModel()
+
+    def insert_key(self, order, key):
+        """Inserts key into the sorted list order, notifying the views if it is the one shown"""
+        i = bisect_left(order, key)
+        if order is self.order:
+            self.beginInsertRows(QModelIndex(), i, i)
+            order.insert(i, key)
+            self.endInsertRows()
+        else:
+            order.insert(i, key)
+
+    def remove_key(self, order, key):
+        i = bisect_left(order, key)
+        if i >= len(order) or order[i] != key:
+            return
+        if order is self.order:
+            self.beginRemoveRows(QModelIndex(), i, i)
+            del order[i]
+            self.endRemoveRows()
+        else:
+            del order[i]
+
+
+class DetectionItemDelegate(QStyledItemDelegate):
+    """Paints a history row with its delete icon, no widget is created per row"""
+    delete_requested = pyqtSignal(int)  # table row
+
+    ROW_HEIGHT = 40
+    ICON_AREA = 30
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.delete_icon = QIcon("icons/delete_icon.png")
+
+    def delete_rect(self, rect):
+        return QRect(rect.right() - self.ICON_AREA - 5, rect.top() + (rect.height() - self.ICON_AREA) // 2,
+                     self.ICON_AREA, self.ICON_AREA)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        # text stops before the icon
+        available = opt.rect.width() - self.ICON_AREA - 20
+        opt.text = opt.fontMetrics.elidedText(opt.text, Qt.TextElideMode.ElideRight, max(available, 0))
+        style = opt.widget.style() if opt.widget is not None else None
+        if style is not None:
+            style.drawControl(style.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+        else:
+            super().paint(painter, opt, index)
+
+        icon_rect = self.delete_rect(option.rect).adjusted(4, 4, -4, -4)
+        self.delete_icon.paint(painter, icon_rect)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and \
+                event.button() == Qt.MouseButton.LeftButton and \
+                self.delete_rect(option.rect).contains(event.position().toPoint()):
+            self.delete_requested.emit(index.data(Qt.ItemDataRole.UserRole))
+            return True
+        return super().editorEvent(event, model, option, index)
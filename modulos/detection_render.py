@@ -0,0 +1,71 @@
+"""YOLO results as plain arrays and their overlay, built on the detection thread
+so the GUI thread only has to show the finished image"""
+import cv2
+import numpy as np
+
+# BGR colour per class id (cycled)
+PALETTE = np.array([
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+    (10, 249, 72), (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0),
+    (168, 153, 44), (255, 194, 0), (147, 69, 52), (255, 115, 100), (236, 24, 0),
+    (255, 56, 132), (133, 0, 82), (255, 56, 203), (200, 149, 255), (199, 55, 255),
+], dtype=np.int32)
+
+
+class DetectionResult:
+    """Detections of one frame as numpy arrays, with no reference to GPU tensors"""
+    __slots__ = ("boxes", "classes", "confidences", "track_ids", "names", "shape", "overlay")
+
+    def __init__(self, boxes, classes, confidences, track_ids, names, shape, overlay=None):
+        self.boxes = boxes              # (N, 4) int32 x1, y1, x2, y2
+        self.classes = classes          # (N,) int32
+        self.confidences = confidences  # (N,) float32
+        self.track_ids = track_ids      # (N,) int64, -1 when untracked
+        self.names = names              # class id -> name
+        self.shape = shape              # (h, w) of the frame
+        self.overlay = overlay          # BGR frame with the detections drawn, or None
+
+    def __len__(self):
+        return len(self.classes)
+
+    @classmethod
+    def from_ultralytics(cls, result):
+        boxes = result.boxes
+        shape = tuple(result.orig_shape[:2])
+        if boxes is None or len(boxes) == 0:
+            return cls(np.empty((0, 4), np.int32), np.empty(0, np.int32), np.empty(0, np.float32),
+                       np.empty(0, np.int64), result.names, shape)
+        # a single device-to-host copy: x1, y1, x2, y2, [track id], conf, cls
+        data = boxes.data.cpu().numpy()
+        track_ids = data[:, 4].astype(np.int64) if boxes.is_track else np.full(len(data), -1, np.int64)
+        return cls(data[:, :4].astype(np.int32), data[:, -1].astype(np.int32),
+                   data[:, -2].astype(np.float32), track_ids, result.names, shape)
+
+    def labels(self):
+        """Text drawn over each box"""
+        return [f"{'' if track_id < 0 else f'id:{track_id} '}{self.names[cls_id]} {conf:.2f}"
+                for cls_id, conf, track_id in zip(self.classes.tolist(), self.confidences.tolist(),
+                                                  self.track_ids.tolist())]
+
+
+def draw_detections(frame, result):
+    """Copy of a BGR frame with the boxes and labels of a DetectionResult"""
+    canvas = frame.copy()
+    if not len(result):
+        return canvas
+    h, w = canvas.shape[:2]
+    line_width = max(round((h + w) / 2 * 0.003), 2)
+    font_scale = line_width / 3
+    font_thickness = max(line_width - 1, 1)
+    colors = PALETTE[result.classes % len(PALETTE)].tolist()
+
+    for (x1, y1, x2, y2), color, label in zip(result.boxes.tolist(), colors, result.labels()):
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), color, line_width, cv2.LINE_AA)
+        (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+        # label above the box, or inside it at the top of the frame
+        outside = y1 - text_h - 3 >= 0
+        y_text = y1 - 2 if outside else y1 + text_h + 2
+        cv2.rectangle(canvas, (x1, y_text - text_h - 1), (x1 + text_w, y_text + 2), color, -1, cv2.LINE_AA)
+        cv2.putText(canvas, label, (x1, y_text), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (255, 255, 255), font_thickness, cv2.LINE_AA)
+    return canvas
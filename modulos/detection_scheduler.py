@@ -0,0 +1,87 @@
+import math
+import time
+
+REALTIME = "realtime"        # playback speed is kept, the stride grows with the inference latency
+EVERY_FRAME = "every_frame"  # every played frame is detected, playback waits for the detector
+
+
+class DetectionScheduler:
+    """Picks which played frames go to continuous detection.
+
+    The stride comes from the measured inference latency per frame and the measured
+    playback interval, so the detector keeps up with the video without queueing frames
+    it would only overwrite. Frames the motion gate finds too similar to what was already
+    detected are left out too. Counters tell how much of the video was actually analysed
+    and how much inference the gate saved"""
+
+    def __init__(self, mode=REALTIME, headroom=1.2, max_stride=30, smoothing=0.2):
+        self.mode = mode
+        self.headroom = headroom      # >1 leaves the detector some slack
+        self.max_stride = max_stride
+        self.smoothing = smoothing    # EMA weight of the newest playback interval
+        self.reset()
+
+    def reset(self):
+        self.stride = 1
+        self.frame_interval = None    # EMA of the seconds between played frames
+        self._last_played = None
+        self._since_submitted = 0
+        self._novel_pending = True    # a novel frame was played since the last submission
+        self.played = 0
+        self.submitted = 0
+        self.skipped = 0              # left out by the stride or because the detector was busy
+        self.gated = 0                # could have been detected but showed nothing new
+
+    def holds_playback(self):
+        return self.mode == EVERY_FRAME
+
+    def frame_played(self, latency):
+        """Call once per played frame with the detector's per-frame latency (s, or None)"""
+        now = time.perf_counter()
+        if self._last_played is not None:
+            interval = now - self._last_played
+            if interval < 1.0:  # longer gaps are pauses, not the playback rate
+                self.frame_interval = interval if self.frame_interval is None else \
+                    self.frame_interval + self.smoothing * (interval - self.frame_interval)
+        self._last_played = now
+        self.played += 1
+
+        if self.mode == EVERY_FRAME or not latency or not self.frame_interval:
+            self.stride = 1
+        else:
+            self.stride = min(self.max_stride, max(1, math.ceil(latency * self.headroom / self.frame_interval)))
+
+    def should_detect(self, detector_ready, novel=True):
+        """Whether the frame just played is sent to the detector. novel is the motion gate's
+        verdict; a novel frame left out by the stride keeps the next eligible one wanted"""
+        self._since_submitted += 1
+        self._novel_pending = self._novel_pending or novel
+        if self.mode != EVERY_FRAME and (self._since_submitted < self.stride or not detector_ready):
+            self.skipped += 1
+            return False
+        if not self._novel_pending:
+            self.gated += 1
+            return False
+        return True
+
+    def mark_submitted(self):
+        self._since_submitted = 0
+        self._novel_pending = False
+        self.submitted += 1
+
+    def stats(self, detector):
+        """Coverage counters of this run, with the detector's own"""
+        processed = detector.processed
+        latency = detector.latency or 0
+        return {
+            "played": self.played,
+            "submitted": self.submitted,
+            "processed": processed,
+            "skipped": self.skipped,
+            "gated": self.gated,
+            "saved_s": round(self.gated * latency, 1),  # inference time the gate avoided
+            "overwritten": detector.overwritten + detector.dropped,
+            "stride": self.stride,
+            "latency_ms": round(latency * 1000, 1),
+            "coverage": processed / self.played if self.played else 0.0,
+        }
@@ -0,0 +1,232 @@
+import numpy as np
+
+# keys an automated detection can have and still be stored only in columns
+COMPACT_KEYS = {"x1", "y1", "x2", "y2", "label", "class", "confidence", "type", "timestamp",
+                "track_id", "frame_number", "video_path", "frame_dimensions", "frame_source"}
+
+
+def parse_timestamp(timestamp_str):
+    """Seconds from 'HH:MM:SS(.fff)' or 'YYYY-MM-DD HH:MM:SS(.fff)', 0 if unknown"""
+    if not timestamp_str or not isinstance(timestamp_str, str):
+        return 0.0
+    try:
+        if ' ' in timestamp_str:
+            timestamp_str = timestamp_str.split(' ')[1]
+        parts = timestamp_str.split(':')
+        if len(parts) == 3:
+            return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+    except ValueError:
+        pass
+    return 0.0
+
+
+class StringTable:
+    """Interns repeated strings (classes, videos...) as small integer ids"""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def intern(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self._ids[value] = value_id
+        return value_id
+
+    def id_of(self, value):
+        """Id of an already interned value, -1 if it was never seen"""
+        return self._ids.get(value, -1)
+
+    def __getitem__(self, value_id):
+        return self.values[value_id] if value_id >= 0 else None
+
+
+class DetectionTable:
+    """Columnar detection storage with amortised O(1) append and vectorised filters.
+
+    Automated detections live only in the numpy columns. Detections carrying extra
+    data (manual boxes, segmentations...) also keep their dict, so the same object
+    is returned and can be found again by identity"""
+
+    COLUMNS = {
+        "x1": np.float32, "y1": np.float32, "x2": np.float32, "y2": np.float32,
+        "confidence": np.float32,
+        "class_id": np.int32,
+        "track_id": np.int64,      # -1 when the detection has no numeric track
+        "frame_number": np.int64,
+        "time_s": np.float64,      # parsed timestamp, used for sorting
+        "video_id": np.int32,
+        "type_id": np.int16,
+        "timestamp_id": np.int32,
+        "dims_id": np.int32,
+        "alive": np.bool_,
+    }
+
+    def __init__(self, capacity=1024):
+        self._initial_capacity = capacity
+        self.clear()
+
+    def clear(self):
+        # bumped on every clear so holders of row numbers can tell they are stale
+        self.generation = getattr(self, "generation", -1) + 1
+        self.classes = StringTable()
+        self.videos = StringTable()
+        self.types = StringTable()
+        self.timestamps = StringTable()
+        self.dims = StringTable()
+        self._capacity = self._initial_capacity
+        self._size = 0
+        self._alive_count = 0
+        self._objects = {}      # row -> original dict
+        self._row_of = {}       # id(dict) -> row
+        self.columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self):
+        return self._alive_count
+
+    def __iter__(self):
+        for row in self.rows():
+            yield self.row(row)
+
+    def __contains__(self, detection):
+        return id(detection) in self._row_of
+
+    @property
+    def size(self):
+        """Number of rows ever appended, including removed ones"""
+        return self._size
+
+    def col(self, name):
+        """View of a column over the used rows"""
+        return self.columns[name][:self._size]
+
+    def append(self, detection):
+        """Adds a detection dict and returns its row number"""
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        c = self.columns
+
+        c["x1"][row] = detection.get("x1", 0) or 0
+        c["y1"][row] = detection.get("y1", 0) or 0
+        c["x2"][row] = detection.get("x2", 0) or 0
+        c["y2"][row] = detection.get("y2", 0) or 0
+        confidence = detection.get("confidence", 0)
+        c["confidence"][row] = confidence if isinstance(confidence, (int, float)) else 0
+        c["class_id"][row] = self.classes.intern(detection.get("class"))
+        track_id = detection.get("track_id")
+        c["track_id"][row] = track_id if isinstance(track_id, (int, np.integer)) and track_id >= 0 else -1
+        frame_number = detection.get("frame_number")
+        c["frame_number"][row] = frame_number if isinstance(frame_number, (int, np.integer)) else -1
+        timestamp = detection.get("timestamp", "")
+        c["time_s"][row] = parse_timestamp(timestamp)
+        c["timestamp_id"][row] = self.timestamps.intern(timestamp)
+        c["video_id"][row] = self.videos.intern(detection.get("video_path"))
+        c["type_id"][row] = self.types.intern(detection.get("type"))
+        c["dims_id"][row] = self.dims.intern(detection.get("frame_dimensions"))
+        c["alive"][row] = True
+
+        if not self._is_compact(detection):
+            self._objects[row] = detection
+            self._row_of[id(detection)] = row
+
+        self._size += 1
+        self._alive_count += 1
+        return row
+
+    def row(self, row):
+        """The detection at a row as a dict (the original object when one was kept)"""
+        obj = self._objects.get(row)
+        if obj is not None:
+            return obj
+
+        c = self.columns
+        video_path = self.videos[int(c["video_id"][row])]
+        frame_number = int(c["frame_number"][row])
+        class_name = self.classes[int(c["class_id"][row])]
+        track_id = int(c["track_id"][row])
+        detection = {
+            "x1": int(c["x1"][row]), "y1": int(c["y1"][row]),
+            "x2": int(c["x2"][row]), "y2": int(c["y2"][row]),
+            "label": class_name,
+            "confidence": float(c["confidence"][row]),
+            "type": self.types[int(c["type_id"][row])],
+            "class": class_name,
+            "timestamp": self.timestamps[int(c["timestamp_id"][row])],
+            "track_id": track_id if track_id >= 0 else None,
+            "frame_number": frame_number,
+            "video_path": video_path,
+            "frame_source": (video_path, frame_number),
+        }
+        dims = self.dims[int(c["dims_id"][row])]
+        if dims is not None:
+            detection["frame_dimensions"] = dims
+        return detection
+
+    def find(self, detection):
+        """Row of a kept detection dict, or -1"""
+        return self._row_of.get(id(detection), -1)
+
+    def remove(self, row):
+        if 0 <= row < self._size and self.columns["alive"][row]:
+            self.columns["alive"][row] = False
+            self._alive_count -= 1
+            obj = self._objects.pop(row, None)
+            if obj is not None:
+                self._row_of.pop(id(obj), None)
+
+    def rows(self):
+        """Row numbers of the detections that were not removed"""
+        return np.flatnonzero(self.col("alive"))
+
+    def filter_mask(self, class_name="", min_conf=0.0, video_path=None):
+        """Boolean mask over all rows. The confidence threshold only applies to automated detections"""
+        mask = self.col("alive").copy()
+        if class_name:
+            mask &= self.col("class_id") == self.classes.id_of(class_name)
+        if min_conf:
+            auto_id = self.types.id_of("auto")
+            mask &= (self.col("type_id") != auto_id) | (self.col("confidence") >= min_conf)
+        if video_path is not None:
+            mask &= self.col("video_id") == self.videos.id_of(video_path)
+        return mask
+
+    def type_mask(self, type_name):
+        return self.col("type_id") == self.types.id_of(type_name)
+
+    def best_per_track(self, rows):
+        """Of the given rows, keeps the highest-confidence one per track id"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return rows
+        tracks = self.columns["track_id"][rows]
+        confidence = self.columns["confidence"][rows]
+        order = np.lexsort((-confidence, tracks))
+        sorted_tracks = tracks[order]
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = sorted_tracks[1:] != sorted_tracks[:-1]
+        return rows[order[first]]
+
+    def sort_by_time(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[np.argsort(self.columns["time_s"][rows], kind="stable")]
+
+    def _is_compact(self, detection):
+        if detection.get("type") != "auto" or not COMPACT_KEYS.issuperset(detection):
+            return False
+        if detection.get("label", detection.get("class")) != detection.get("class"):
+            return False
+        if "frame_source" in detection and \
+                tuple(detection["frame_source"]) != (detection.get("video_path"), detection.get("frame_number")):
+            return False
+        track_id = detection.get("track_id")
+        return track_id is None or isinstance(track_id, (int, np.integer)) and track_id >= 0
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(self._capacity, dtype=column.dtype)
+            grown[:column.size] = column
+            self.columns[name] = grown
@@ -1,32 +1,112 @@
-from PyQt6.QtCore import QThread, pyqtSignal, QMutex, QWaitCondition, QElapsedTimer
-from ultralytics import YOLO
+from collections import deque
+import time
+from typing import TYPE_CHECKING
+from PyQt6.QtCore import QThread, pyqtSignal, QMutex, QWaitCondition
 import numpy as np
-import torch
+from .lazy_imports import torch
+from .detection_render import DetectionResult, draw_detections
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
 
 class DetectionThread(QThread):
-    detection_finished = pyqtSignal(object, object, int)
+    detection_finished = pyqtSignal(object, object, int)  # DetectionResult (with overlay), frame, frame_num
     
-    def __init__(self, model: YOLO, parent=None):
+    def __init__(self, model: "YOLO", parent=None, batch_size=1, max_wait_ms=100):
         super().__init__(parent)
         self.model = model
+        self.cpu_model = None  # ONNX/OpenVINO export of model, used instead of it when there is no GPU
         self.current_frame = None
         self.current_frame_num = 0
         self.running = True
         self.mutex = QMutex()
         self.condition = QWaitCondition()
         self.is_first_frame = True  
-        self.cuda_available = torch.cuda.is_available()
+        self.cuda_available = None  # checked on first inference, so torch is not imported at startup
+
+        # batching: 1 keeps only the latest frame, N > 1 queues frames and runs them together
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait_ms = max_wait_ms
+        self.pending = deque()  # (frame, frame_num) waiting for a batch
+        self.pending_times = deque()  # perf_counter() when each pending frame was queued
+        self.max_pending = 4 * self.batch_size
+        self.dropped = 0
+        self.tiler = None  # TiledDetector for small objects, None infers whole frames only
+
+        # statistics read by the DetectionScheduler
+        self.inferring = False
+        self.processed = 0     # frames inferred
+        self.overwritten = 0   # latest-frame mode: frames replaced before being inferred
+        self.latency = None    # EMA of the inference seconds per frame
+        self.latency_smoothing = 0.2
+        self.stats_run = 0     # bumped by reset_stats
 
     def set_frame(self, frame: np.ndarray, frame_num: int):
         self.mutex.lock()
-        self.current_frame = frame
-        self.current_frame_num = frame_num
+        if self.batch_size > 1:
+            if len(self.pending) >= self.max_pending:
+                # inference is behind, the oldest frame is given up
+                self.pending.popleft()
+                self.pending_times.popleft()
+                self.dropped += 1
+            self.pending.append((frame, frame_num))
+            self.pending_times.append(time.perf_counter())
+        else:
+            if self.current_frame is not None:
+                self.overwritten += 1
+            self.current_frame = frame
+            self.current_frame_num = frame_num
         self.condition.wakeOne()
         self.mutex.unlock()
 
-    def set_model(self, model: YOLO | None):
+    def set_model(self, model: "YOLO | None", cpu_model: "YOLO | None" = None):
         self.mutex.lock()
         self.model = model
+        self.cpu_model = cpu_model
+        self.mutex.unlock()
+
+    def set_tiler(self, tiler):
+        self.mutex.lock()
+        self.tiler = tiler
+        self.mutex.unlock()
+
+    def set_batching(self, batch_size, max_wait_ms):
+        self.mutex.lock()
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait_ms = max_wait_ms
+        self.max_pending = 4 * self.batch_size
+        if self.batch_size == 1 and self.pending:
+            # back to latest-frame mode, keeps only the newest queued frame
+            self.current_frame, self.current_frame_num = self.pending[-1]
+            self.pending.clear()
+            self.pending_times.clear()
+        self.condition.wakeOne()
+        self.mutex.unlock()
+
+    def can_accept(self):
+        """True if a frame given now would be inferred without replacing or dropping another"""
+        self.mutex.lock()
+        try:
+            if self.batch_size > 1:
+                return len(self.pending) < self.max_pending
+            return self.current_frame is None and not self.inferring
+        finally:
+            self.mutex.unlock()
+
+    def reset_stats(self):
+        self.mutex.lock()
+        self.processed = 0
+        self.overwritten = 0
+        self.dropped = 0
+        self.stats_run += 1  # a batch already in flight is not counted into the new run
+        self.mutex.unlock()
+
+    def clear_pending(self):
+        """Forgets queued frames, e.g. after a seek or when another video is opened"""
+        self.mutex.lock()
+        self.pending.clear()
+        self.pending_times.clear()
+        self.current_frame = None
         self.mutex.unlock()
 
     def stop(self):
@@ -36,49 +116,106 @@ class DetectionThread(QThread):
         self.mutex.unlock()
         self.wait()  # waits for thread to end 
 
+    def _take_batch(self):
+        """Called with the mutex locked. Waits until a full batch is queued or the
+        deadline counted from when the oldest queued frame was queued expires"""
+        entered = time.perf_counter()
+        while self.running and self.batch_size > 1 and len(self.pending) < self.batch_size:
+            queued_at = self.pending_times[0] if self.pending_times else entered
+            remaining = self.max_wait_ms - (time.perf_counter() - queued_at) * 1000.0
+            if remaining <= 0:
+                break
+            self.condition.wait(self.mutex, max(1, int(remaining)))
+
+        if self.current_frame is not None:
+            # a frame set before switching to batching
+            self.pending.appendleft((self.current_frame, self.current_frame_num))
+            self.pending_times.appendleft(entered)
+            self.current_frame = None
+        batch = []
+        while self.pending and len(batch) < self.batch_size:
+            batch.append(self.pending.popleft())
+            self.pending_times.popleft()
+        return batch
+
     def run(self):
         while True:
             self.mutex.lock()
-            while self.current_frame is None and self.running:
+            while self.current_frame is None and not self.pending and self.running:
                 self.condition.wait(self.mutex)
             
             if not self.running:
                 self.mutex.unlock()
                 break
                 
-            frame = self.current_frame
-            frame_num = self.current_frame_num
-            self.current_frame = None
+            if self.batch_size > 1 or self.pending:
+                batch = self._take_batch()
+            else:
+                batch = [(self.current_frame, self.current_frame_num)]
+                self.current_frame = None
             
             model = self.model
+            cpu_model = self.cpu_model
+            tiler = self.tiler
+            stats_run = self.stats_run
+            self.inferring = model is not None and bool(batch)
             self.mutex.unlock()
 
-            if model is None:
+            if model is None or not batch:
                 continue
 
+            start = time.perf_counter()
             try:
+                if self.cuda_available is None:
+                    self.cuda_available = torch.cuda.is_available()
+                device = 'cuda' if self.cuda_available else 'cpu'
+                if cpu_model is not None and device == 'cpu':
+                    model = cpu_model
                 with torch.no_grad():
-                    if self.is_first_frame:
+                    results = []
+                    frames = [frame for frame, _ in batch]
+                    if tiler is not None:
+                        # whole frame + tiles per frame, already merged and tracked
+                        results = [tiler.detect(model, frame, device) for frame in frames]
+                        frames = []
+                    elif self.is_first_frame:
                         # For the first frame: only detection, without tracking 
-                        results = model.predict(
-                            frame, 
+                        results += model.predict(
+                            frames[0], 
                             verbose=False, 
-                            device='cuda' if self.cuda_available else 'cpu',
+                            device=device,
                             conf=0.5
                         )
+                        frames = frames[1:]
                         self.is_first_frame = False
-                    else:
-                        # For next frames: tracking
-                        results = model.track(
-                            frame, 
+                    if frames:
+                        # For next frames: tracking. A list is inferred as one batch and the
+                        # tracker is still updated frame by frame in list order
+                        results += model.track(
+                            frames if len(frames) > 1 else frames[0], 
                             persist=True, 
                             verbose=False, 
-                            device='cuda' if self.cuda_available else 'cpu', 
+                            device=device, 
                             tracker="botsort.yaml"
                         )
                     
-                    if results and len(results) > 0:
-                        self.detection_finished.emit(results[0], frame, frame_num)
+                # arrays and overlay are built here, the GUI thread only shows them
+                for result, (frame, frame_num) in zip(results, batch):
+                    detections = result if tiler is not None else DetectionResult.from_ultralytics(result)
+                    if len(detections):
+                        detections.overlay = draw_detections(frame, detections)
+                    self.detection_finished.emit(detections, frame, frame_num)
+
+                # includes drawing: it is worker time the stride has to leave room for
+                per_frame = (time.perf_counter() - start) / len(batch)
+                self.latency = per_frame if self.latency is None else \
+                    self.latency + self.latency_smoothing * (per_frame - self.latency)
+                self.mutex.lock()
+                if stats_run == self.stats_run:
+                    self.processed += len(batch)
+                self.mutex.unlock()
                         
             except Exception as e:
-                print("DetectionThread erro:", e)
\ No newline at end of file
+                print("DetectionThread erro:", e)
+            finally:
+                self.inferring = False
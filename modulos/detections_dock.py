@@ -1,12 +1,15 @@
 import os
 import cv2
-from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtCore import Qt, QRect, QTimer
 from PyQt6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout,
                             QLabel, QComboBox, QDoubleSpinBox, QPushButton, QMessageBox, QVBoxLayout,
-                            QListWidget, QGroupBox, QCompleter, QListWidgetItem, QDialog)
-from PyQt6.QtGui import QIcon, QColor, QPixmap, QPainter, QPen, QImage
+                            QListView, QAbstractItemView, QGroupBox, QCompleter, QDialog)
+from PyQt6.QtGui import QIcon, QColor, QPixmap, QPainter, QPen, QImage, QCursor
 from PyQt6.QtCore import Qt
 from .translations import TEXTS
+from .detection_table import DetectionTable
+from .detection_history_model import DetectionHistoryModel, DetectionItemDelegate
+import numpy as np
 
 
 class DetectionsDockWidget(QDockWidget):
@@ -63,22 +66,34 @@ class DetectionsDockWidget(QDockWidget):
         filter_layout.addWidget(self.confidence_input)
         filter_layout.addWidget(self.filter_button)
         
-        # List of detections
-        self.detections_list = QListWidget()
-        self.detections_list.itemClicked.connect(self.show_detection_frame)
+        # Stores all detections for filtering (columnar, see DetectionTable)
+        self.all_detections = DetectionTable()
+
+        # List of detections, rows are painted by the delegate straight from the table
+        self.history_model = DetectionHistoryModel(self.all_detections, self)
+        self.history_delegate = DetectionItemDelegate(self)
+        self.history_delegate.delete_requested.connect(self.delete_single_detection,
+                                                       Qt.ConnectionType.QueuedConnection)
+        self.detections_list = QListView()
+        self.detections_list.setModel(self.history_model)
+        self.detections_list.setItemDelegate(self.history_delegate)
+        self.detections_list.setUniformItemSizes(True)
+        self.detections_list.setMouseTracking(True)
+        self.detections_list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.detections_list.clicked.connect(self.show_detection_frame)
         self.detections_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 font-size: 12px;
                 background-color: #f0f0f0;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
                 border-bottom: 1px solid #ddd;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #e0e0e0;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #5c9eff;
                 color: white;
             }
@@ -90,9 +105,20 @@ class DetectionsDockWidget(QDockWidget):
         
         self.setWidget(main_widget)
         
-        # Stores all detections for filtering
-        self.all_detections = []
-        self.max_visible = 16
+
+        # incremental filter state, rebuilt only when the filters or the video change
+        self._filter_key = None
+        self._best_by_track = {}    # track_id -> row of its best detection
+        self._order = []            # (time_s, row) of the rows that pass the filters
+        self._order_current = []    # same, only rows of the current video
+        self._current_video_ids = {}  # video_id -> belongs to the current video
+
+        # scrolling is coalesced, a burst of detections costs one scroll
+        self._follow_newest = True
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(100)
+        self._refresh_timer.timeout.connect(self.refresh_visible)
         
         self.setStyleSheet("""
             QGroupBox {
@@ -187,204 +213,191 @@ class DetectionsDockWidget(QDockWidget):
             current_video_path = self.main.video_path if self.main.video_path else "Live"
             detection["video_path"] = current_video_path
         
-        self.all_detections.append(detection)
-        self.apply_filters()
+        if not self._refresh_timer.isActive():
+            # decided before the new row grows the list
+            self._follow_newest = self._at_bottom()
+        row = self.all_detections.append(detection)
+        if not self._index_is_current():
+            self.rebuild_index()
+        else:
+            self._index_row(row)
+        self.schedule_refresh()
 
     def filter_all(self, class_name="", min_conf=0.0):
         selected_class = class_name if class_name else self.class_filter.currentText()
         min_conf = min_conf if min_conf else self.confidence_input.value()
 
-        best_detections = {}
-        for d in self.all_detections:
-            if selected_class and d.get("class") != selected_class:
-                continue
-            if d.get("type") == "auto" and d.get("confidence", 0) < min_conf:
-                continue
-
-            tid = d.get("track_id")
-            if tid is not None:
-                if tid not in best_detections or d.get("confidence", 0) > best_detections[tid].get("confidence", 0):
-                    best_detections[tid] = d
-            else:  # manual or without ID
-                best_detections[f"manual_{id(d)}"] = d
+        table = self.all_detections
+        rows = np.flatnonzero(table.filter_mask(selected_class, min_conf))
+        tracked = table.columns["track_id"][rows] >= 0
+        # best detection per track, manual or without ID are all kept
+        keep = np.concatenate([table.best_per_track(rows[tracked]), rows[~tracked]])
 
         # returns list, without [-16:]
-        return list(best_detections.values())
+        return [table.row(row) for row in np.sort(keep)]
+
+    def filtered_rows(self):
+        """Rows that pass the filters: every manual detection and the best one per track, sorted by time"""
+        table = self.all_detections
+        mask = table.filter_mask(self.class_filter.currentText(), self.confidence_input.value())
+
+        manual = mask & table.type_mask("manual")
+        tracked = mask & ~manual & (table.col("track_id") >= 0)
+        rows = np.concatenate([np.flatnonzero(manual), table.best_per_track(np.flatnonzero(tracked))])
+        return table.sort_by_time(rows)
 
     def apply_filters(self):
         """Apply filters showing only the best detection by ID and sort by timestamp"""
-        
         scroll_position = self.detections_list.verticalScrollBar().value()
-        current_row = self.detections_list.currentRow()
-        
-        selected_class = self.class_filter.currentText()
-        min_confidence = self.confidence_input.value()
-        
-        self.detections_list.clear()
-        
-        best_detections = {}
-        filtered_detections = []
-        
-        for detection in self.all_detections:
-            if selected_class != "" and detection.get("class") != selected_class:
-                continue
-                
-            if detection.get("type") == "auto" and detection.get("confidence", 0) < min_confidence:
-                continue
-                
-            track_id = detection.get("track_id")
-            
-            if track_id is not None:
-                if detection.get("type") == "manual":
-                    filtered_detections.append(detection)
-                else:
-                    if track_id not in best_detections or \
-                    detection.get("confidence", 0) > best_detections[track_id].get("confidence", 0):
-                        best_detections[track_id] = detection
-        
-        filtered_detections.extend(best_detections.values())
-        
-        def parse_timestamp(timestamp_str):
-            if not timestamp_str:
-                return 0
-                    
-            if ':' in timestamp_str and '-' not in timestamp_str:
-                parts = timestamp_str.split(':')
-                if len(parts) == 3:
-                    return int(parts[0])*3600 + int(parts[1])*60 + float(parts[2])
-                
-            elif ' ' in timestamp_str:
-                date_part, time_part = timestamp_str.split(' ')
-                time_parts = time_part.split(':')
-                if len(time_parts) >= 3:
-                    return int(time_parts[0])*3600 + int(time_parts[1])*60 + float(time_parts[2])
-                
-            return 0
-        
-        try:
-            filtered_detections.sort(key=lambda x: parse_timestamp(x.get("timestamp", "")))
-        except Exception as e:
-            print(f"Erro ao ordenar detecções: {e}")
-            filtered_detections.sort(key=lambda x: x.get("timestamp", ""))
+        self._follow_newest = self._at_bottom()
+        self.rebuild_index()
+        if not self._follow_newest:
+            self.detections_list.verticalScrollBar().setValue(scroll_position)
+        return self.refresh_visible()
 
+    def _current_filter_key(self):
         current_video = os.path.basename(str(self.main.video_path or "Live"))
-        # current video detections
-        current_video_dets = [d for d in filtered_detections
-                            if os.path.basename(str(d.get("video_path") or "Live")) == current_video]
-
-        if current_video_dets:
-            visible = current_video_dets[-self.max_visible:]
-        else:
-            visible = filtered_detections[-self.max_visible:]
-
-        self.detections_list.clear()
-        for detection in visible:
-            self.add_detection_to_list(detection)
-
-        self.detections_list.verticalScrollBar().setValue(scroll_position)
-        if 0 <= current_row < self.detections_list.count():
-            self.detections_list.setCurrentRow(current_row)
-
-        return visible
-
-    def add_detection_to_list(self, detection):
-
-        item = QListWidgetItem()
-        item.setData(Qt.ItemDataRole.UserRole, detection)
-
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(5, 2, 10, 5)
-        layout.setSpacing(5)
-
-        # Detection text
-        class_name = detection.get("class", "Desconhecido")
-        confidence = detection.get("confidence", 0)
-        timestamp = detection.get("timestamp", "")
-        track_id = detection.get("track_id")
-
-        # Fix video_path = None issue in live mode
-        current_video_path = self.main.video_path if self.main.video_path else "Live"
-        detection_video_path = detection.get("video_path", "Desconhecido")
-        
-        if detection_video_path is None:
-            detection_video_path = "Live"
-        
-        current_video = os.path.basename(str(current_video_path))
-        video_name = os.path.basename(str(detection_video_path))
-
-        # Assemble text
-        text = f"{timestamp} - {class_name}" if timestamp else class_name
-        if detection.get("type") == "manual":
-            text += " (manual)"
-        else:
-            text += f" ({confidence:.2f})" if confidence else ""
-            if track_id is not None:
-                text += f" (ID: {track_id})"
-                
-        label = QLabel(text)
-        label.setStyleSheet("font-size: 12px;")
-
-
-        delete_btn = QPushButton()
-        delete_btn.setToolTip(self.texts["delete_detection"])
-        delete_btn.setIcon(QIcon("icons/delete_icon.png"))
-        delete_btn.setFixedSize(30, 30)
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background: transparent;
-                border: none;
-                padding: 4px;
-            }
-            QPushButton:hover {
-                background: transparent;
-            }
-        """)
-        delete_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-
-        delete_btn.clicked.connect(lambda _=None, btn=delete_btn: self.delete_single_detection(btn))
-
-        layout.addWidget(label, 1)  
-        layout.addWidget(delete_btn, 0, Qt.AlignmentFlag.AlignRight)
+        return (self.all_detections.generation, self.class_filter.currentText(),
+                self.confidence_input.value(), current_video)
+
+    def _index_is_current(self):
+        return self._filter_key == self._current_filter_key()
+
+    def rebuild_index(self):
+        """Recomputes the filter state from the whole table (vectorised)"""
+        table = self.all_detections
+        self._filter_key = self._current_filter_key()
+        self._current_video_ids = {}
+
+        rows = np.sort(self.filtered_rows())
+        rows = table.sort_by_time(rows)  # stable, ties stay ordered by row like (time_s, row) tuples
+        times = table.columns["time_s"][rows]
+        self._order = list(zip(times.tolist(), rows.tolist()))
+        self._order_current = [key for key in self._order if self._in_current_video(key[1])]
+
+        tracks = table.columns["track_id"][rows]
+        manual = table.columns["type_id"][rows] == table.types.id_of("manual")
+        self._best_by_track = dict(zip(tracks[~manual].tolist(), rows[~manual].tolist()))
+        # row numbers may have been reused by a cleared table, the view is reset too
+        self.history_model.set_order(self._displayed_order())
+
+    def _displayed_order(self):
+        """Detections of the current video when there are any, otherwise all of them"""
+        return self._order_current or self._order
+
+    def _sync_displayed_order(self):
+        if self.history_model.order is not self._displayed_order():
+            self.history_model.set_order(self._displayed_order())
+
+    def _in_current_video(self, row):
+        video_id = int(self.all_detections.columns["video_id"][row])
+        match = self._current_video_ids.get(video_id)
+        if match is None:
+            path = self.all_detections.videos[video_id]
+            match = os.path.basename(str(path or "Live")) == self._filter_key[3]
+            self._current_video_ids[video_id] = match
+        return match
+
+    def _passes_filters(self, row):
+        c = self.all_detections.columns
+        _, class_name, min_conf, _ = self._filter_key
+        if not c["alive"][row]:
+            return False
+        if class_name and self.all_detections.classes[int(c["class_id"][row])] != class_name:
+            return False
+        if min_conf and c["type_id"][row] == self.all_detections.types.id_of("auto") and c["confidence"][row] < min_conf:
+            return False
+        return True
+
+    def _insert_order(self, row):
+        key = (float(self.all_detections.columns["time_s"][row]), row)
+        self.history_model.insert_key(self._order, key)
+        if self._in_current_video(row):
+            self.history_model.insert_key(self._order_current, key)
+        self._sync_displayed_order()
+
+    def _remove_order(self, row):
+        key = (float(self.all_detections.columns["time_s"][row]), row)
+        for order in (self._order, self._order_current):
+            self.history_model.remove_key(order, key)
+        self._sync_displayed_order()
+
+    def _index_row(self, row):
+        """Adds one new row to the filter state, O(log n) lookups"""
+        if not self._passes_filters(row):
+            return
+        c = self.all_detections.columns
+        if c["type_id"][row] == self.all_detections.types.id_of("manual"):
+            self._insert_order(row)
+            return
 
-        widget.setLayout(layout)
-        widget.adjustSize()
-        item.setSizeHint(widget.sizeHint())
-        widget.setMinimumHeight(40)
-        
-        self.detections_list.addItem(item)
-        self.detections_list.setItemWidget(item, widget)
+        track_id = int(c["track_id"][row])
+        if track_id < 0:
+            return
+        best = self._best_by_track.get(track_id)
+        if best is not None:
+            if c["confidence"][row] <= c["confidence"][best]:
+                return
+            self._remove_order(best)
+        self._best_by_track[track_id] = row
+        self._insert_order(row)
+
+    def _unindex_row(self, row):
+        """Drops a removed row, promoting the next best detection of its track"""
+        if not self._index_is_current():
+            self.rebuild_index()
+            return
+        self._remove_order(row)
+        track_id = int(self.all_detections.columns["track_id"][row])
+        if self._best_by_track.get(track_id) != row:
+            return
+        del self._best_by_track[track_id]
+
+        table = self.all_detections
+        candidates = np.flatnonzero((table.col("track_id") == track_id) &
+                                    ~table.type_mask("manual") &
+                                    table.filter_mask(self._filter_key[1], self._filter_key[2]))
+        if candidates.size:
+            best = int(table.best_per_track(candidates)[0])
+            self._best_by_track[track_id] = best
+            self._insert_order(best)
+
+    def _at_bottom(self):
+        scroll_bar = self.detections_list.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum()
+
+    def schedule_refresh(self):
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def refresh_visible(self):
+        """Keeps the newest detection in view unless the user scrolled back in the history"""
+        self._refresh_timer.stop()
+        if self._follow_newest:
+            self.detections_list.scrollToBottom()
+        return self.history_model.order
+
+    def delete_single_detection(self, row):
+        if not self.all_detections.columns["alive"][row]:
+            return
 
+        reply = QMessageBox.question(
+            self, self.texts["confirm_deletion"],
+            self.texts["deletion_question"],
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
 
-    def delete_single_detection(self, button):
- 
-        for i in range(self.detections_list.count()):
-            item = self.detections_list.item(i)
-            widget = self.detections_list.itemWidget(item)
-            if widget and widget.findChild(QPushButton) is button:
-                detection = item.data(Qt.ItemDataRole.UserRole)
-
-                reply = QMessageBox.question(
-                    self, self.texts["confirm_deletion"],
-                    self.texts["deletion_question"],
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
-                if reply != QMessageBox.StandardButton.Yes:
-                    return
-
-                # Removes from visual list
-                self.detections_list.takeItem(i)
-
-                # Removes from internal list 
-                if detection in self.all_detections:
-                    self.all_detections.remove(detection)
-
-                break
+        # Removes from internal list, the view follows through the model
+        self.all_detections.remove(row)
+        self._unindex_row(row)
             
     def remove_detection(self, detection):
-        if detection in self.all_detections:
-            self.all_detections.remove(detection)
-            self.apply_filters() 
+        row = self.all_detections.find(detection)
+        if row >= 0:
+            self.all_detections.remove(row)
+            self._unindex_row(row)
             
     def set_dark_mode(self, enable=True):
         if enable:
@@ -411,7 +424,7 @@ class DetectionsDockWidget(QDockWidget):
                     color: #ffffff;
                 }
                 
-                QListWidget {
+                QListView {
                     background-color: #2d2d2d;
                     color: #ffffff;
                     border: 1px solid #555;
@@ -419,16 +432,16 @@ class DetectionsDockWidget(QDockWidget):
                     font-size: 12px;
                     alternate-background-color: #353535;
                 }
-                QListWidget::item {
+                QListView::item {
                     background-color: #353535;
                     color: #ffffff;
                     padding: 5px;
                     border-bottom: 1px solid #444;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: #454545;
                 }
-                QListWidget::item:selected {
+                QListView::item:selected {
                     background-color: #2a82da;
                     color: white;
                 }
@@ -477,23 +490,23 @@ class DetectionsDockWidget(QDockWidget):
             """)
             
             self.detections_list.setStyleSheet("""
-                QListWidget {
+                QListView {
                     background-color: #2d2d2d;
                     color: #ffffff;
                     border: 1px solid #555;
                     border-radius: 4px;
                     font-size: 12px;
                 }
-                QListWidget::item {
+                QListView::item {
                     background-color: #353535;
                     color: #ffffff;
                     padding: 5px;
                     border-bottom: 1px solid #444;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: #454545;
                 }
-                QListWidget::item:selected {
+                QListView::item:selected {
                     background-color: #2a82da;
                     color: white;
                 }
@@ -522,23 +535,23 @@ class DetectionsDockWidget(QDockWidget):
                     color: #000000;
                 }
                 
-                QListWidget {
+                QListView {
                     background-color: #f0f0f0;
                     color: #000000;
                     border: 1px solid #ccc;
                     border-radius: 4px;
                     font-size: 12px;
                 }
-                QListWidget::item {
+                QListView::item {
                     background-color: white;
                     color: #000000;
                     padding: 5px;
                     border-bottom: 1px solid #ddd;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: #e0e0e0;
                 }
-                QListWidget::item:selected {
+                QListView::item:selected {
                     background-color: #5c9eff;
                     color: white;
                 }
@@ -574,25 +587,30 @@ class DetectionsDockWidget(QDockWidget):
             """)
             
             self.detections_list.setStyleSheet("""
-                QListWidget {
+                QListView {
                     font-size: 12px;
                     background-color: #f0f0f0;
                 }
-                QListWidget::item {
+                QListView::item {
                     padding: 5px;
                     border-bottom: 1px solid #ddd;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: #e0e0e0;
                 }
-                QListWidget::item:selected {
+                QListView::item:selected {
                     background-color: #5c9eff;
                     color: white;
                 }
             """)
         
-    def show_detection_frame(self, item):
-        detection = item.data(Qt.ItemDataRole.UserRole)
+    def show_detection_frame(self, index):
+        # a click on the delete icon is handled by the delegate
+        click_pos = self.detections_list.viewport().mapFromGlobal(QCursor.pos())
+        if self.history_delegate.delete_rect(self.detections_list.visualRect(index)).contains(click_pos):
+            return
+
+        detection = self.all_detections.row(index.data(Qt.ItemDataRole.UserRole))
         if not detection or "frame_source" not in detection:
             QMessageBox.information(self, "Sem imagem", "Frame não disponível para esta detecção.")
             return
@@ -602,12 +620,9 @@ class DetectionsDockWidget(QDockWidget):
             QMessageBox.information(self, "Sem imagem", f"Vídeo não encontrado:\n{video_path}")
             return
 
-        # loads frame
-        cap = cv2.VideoCapture(video_path)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-        ret, frame = cap.read()
-        cap.release()
-        if not ret:
+        # loads frame (shared cache, no extra decode if the frame was just used)
+        frame = self.main.frame_provider.get_frame(video_path, frame_num)
+        if frame is None:
             QMessageBox.information(self, "Sem imagem", f"Erro ao ler o frame {frame_num}.")
             return
 
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import threading
+import cv2
+from .keyframe_index import KeyframeIndex, seek_capture
+
+
+class FrameProvider:
+    """Decoded frames by (video_path, frame_number) behind a byte-bounded LRU cache.
+
+    Returned arrays are shared with the cache and read-only, copy before drawing on them"""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, max_open_videos=4):
+        self.max_bytes = max_bytes
+        self.max_open_videos = max_open_videos
+        self._frames = OrderedDict()    # (video_path, frame_number) -> ndarray
+        self._captures = OrderedDict()  # video_path -> (VideoCapture, KeyframeIndex | None)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_frame(self, video_path, frame_number):
+        """Returns the BGR frame or None if it cannot be read"""
+        if not video_path or frame_number is None:
+            return None
+        key = (str(video_path), int(frame_number))
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+
+            self.misses += 1
+            cap, index = self._capture_for(key[0])
+            if cap is None:
+                return None
+            seek_capture(cap, key[1], index)
+            ret, frame = cap.read()
+            if not ret:
+                return None
+            self._store(key, frame)
+            return frame
+
+    def put(self, video_path, frame_number, frame):
+        """Adds a frame decoded elsewhere (e.g. by playback), the provider takes ownership"""
+        if not video_path or frame is None:
+            return
+        with self._lock:
+            key = (str(video_path), int(frame_number))
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return
+            self._store(key, frame)
+
+    def set_keyframe_index(self, video_path, index):
+        with self._lock:
+            entry = self._captures.get(str(video_path))
+            if entry is not None:
+                self._captures[str(video_path)] = (entry[0], index)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {"frames": len(self._frames), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def release(self, video_path=None):
+        """Closes the captures and drops cached frames (of one video or all)"""
+        with self._lock:
+            for path in list(self._captures):
+                if video_path is None or path == str(video_path):
+                    self._captures.pop(path)[0].release()
+            for key in list(self._frames):
+                if video_path is None or key[0] == str(video_path):
+                    self._bytes -= self._frames.pop(key).nbytes
+
+    def _capture_for(self, video_path):
+        entry = self._captures.get(video_path)
+        if entry is not None:
+            self._captures.move_to_end(video_path)
+            return entry
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None, None
+        entry = (cap, KeyframeIndex.load(video_path))
+        self._captures[video_path] = entry
+        while len(self._captures) > self.max_open_videos:
+            _, (old_cap, _) = self._captures.popitem(last=False)
+            old_cap.release()
+        return entry
+
+    def _store(self, key, frame):
+        frame.flags.writeable = False
+        self._frames[key] = frame
+        self._bytes += frame.nbytes
+        self._evict()
+
+    def _evict(self):
+        # always keeps the most recent frame, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            _, old = self._frames.popitem(last=False)
+            self._bytes -= old.nbytes
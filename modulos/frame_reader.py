@@ -0,0 +1,182 @@
+from collections import deque
+import time
+import cv2
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal, QMutex, QWaitCondition
+from .keyframe_index import seek_capture
+
+
+class FrameReaderThread(QThread):
+    """Decodes video frames ahead of playback into a ring of preallocated buffers"""
+    error = pyqtSignal(str)
+
+    def __init__(self, video_path, queue_depth=8, drop_frames=False, motion_gate=None, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.queue_depth = max(2, int(queue_depth))
+        self.drop_frames = drop_frames  # False: decoder waits for a free slot, True: overwrites the oldest frame
+        self.running = True
+        self.mutex = QMutex()
+        self.not_full = QWaitCondition()
+
+        self._buffers = None
+        self._free = deque(range(self.queue_depth))
+        self._ready = deque()  # (slot, frame_num, novel)
+        self._in_use = None    # slot currently held by the consumer
+        self._pending_seek = None
+        self._generation = 0
+        self._eof = False
+        self._index = None
+        self.motion_gate = motion_gate  # MotionGate run on every decoded frame, None to skip it
+
+        # statistics
+        self.decoded = 0
+        self.dropped = 0
+        self.underruns = 0
+        self.decode_ms = 0.0
+
+    def take_frame(self):
+        """Returns (frame_num, frame, novel) for the next decoded frame or None if nothing is ready.
+        novel is the motion gate's verdict. The array is only valid until a later call returns a new frame"""
+        self.mutex.lock()
+        try:
+            if not self._ready:
+                if not self._eof and self._pending_seek is None:
+                    self.underruns += 1
+                # the frame on screen stays held until a new one replaces it
+                return None
+
+            if self._in_use is not None:
+                self._free.append(self._in_use)
+            slot, frame_num, novel = self._ready.popleft()
+            self._in_use = slot
+            self.not_full.wakeOne()
+            return frame_num, self._buffers[slot], novel
+        finally:
+            self.mutex.unlock()
+
+    def seek(self, frame_num):
+        """Discards the prefetched frames and restarts decoding at frame_num"""
+        self.mutex.lock()
+        self._generation += 1
+        while self._ready:
+            self._free.append(self._ready.popleft()[0])
+        self._pending_seek = max(0, int(frame_num))
+        self._eof = False
+        self.not_full.wakeOne()
+        self.mutex.unlock()
+
+    def set_keyframe_index(self, index):
+        self.mutex.lock()
+        self._index = index
+        self.mutex.unlock()
+
+    def set_motion_gate(self, motion_gate):
+        self.mutex.lock()
+        self.motion_gate = motion_gate
+        self.mutex.unlock()
+
+    def set_drop_frames(self, drop_frames):
+        self.mutex.lock()
+        self.drop_frames = drop_frames
+        self.not_full.wakeOne()
+        self.mutex.unlock()
+
+    def at_end(self):
+        """True when the decoder reached the end of the video and every frame was consumed"""
+        self.mutex.lock()
+        at_end = self._eof and not self._ready and self._pending_seek is None
+        self.mutex.unlock()
+        return at_end
+
+    def stats(self):
+        self.mutex.lock()
+        stats = {
+            "queued": len(self._ready),
+            "depth": self.queue_depth,
+            "policy": "drop" if self.drop_frames else "block",
+            "decoded": self.decoded,
+            "dropped": self.dropped,
+            "underruns": self.underruns,
+            "decode_ms": self.decode_ms,
+        }
+        self.mutex.unlock()
+        return stats
+
+    def stop(self):
+        self.mutex.lock()
+        self.running = False
+        self.not_full.wakeAll()
+        self.mutex.unlock()
+        self.wait()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            self.error.emit(f"Could not open {self.video_path}")
+            return
+
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # one contiguous block, each slot is a view that cap.read() decodes into
+        buffers = np.empty((self.queue_depth, max(height, 1), max(width, 1), 3), dtype=np.uint8)
+        self._buffers = [buffers[i] for i in range(self.queue_depth)]
+        next_frame = 0
+
+        while True:
+            self.mutex.lock()
+            while self.running and self._pending_seek is None and \
+                    (self._eof or (not self._free and not self.drop_frames) or
+                     (not self._free and not self._ready)):
+                self.not_full.wait(self.mutex)
+
+            if not self.running:
+                self.mutex.unlock()
+                break
+
+            if self._pending_seek is not None:
+                next_frame = self._pending_seek
+                self._pending_seek = None
+                index = self._index
+                gate = self.motion_gate
+                self.mutex.unlock()
+                seek_capture(cap, next_frame, index)
+                if gate is not None:
+                    gate.reset()  # frames after a jump are compared with nothing
+                continue
+
+            if self._free:
+                slot = self._free.popleft()
+            else:
+                # drop policy: recycle the oldest frame that was never shown
+                slot = self._ready.popleft()[0]
+                self.dropped += 1
+            generation = self._generation
+            gate = self.motion_gate
+            self.mutex.unlock()
+
+            start = time.perf_counter()
+            ret, frame = cap.read(self._buffers[slot])
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            novel = True
+            if ret and gate is not None:
+                novel = gate.update(frame)[0]
+
+            self.mutex.lock()
+            if generation != self._generation:
+                # a seek arrived while decoding, this frame belongs to the old position
+                self._free.append(slot)
+            elif not ret:
+                self._free.append(slot)
+                self._eof = True
+            else:
+                if frame is not self._buffers[slot]:
+                    # frame size changed mid-stream, OpenCV allocated a new array
+                    self._buffers[slot] = frame
+                self._ready.append((slot, next_frame, novel))
+                next_frame += 1
+                self.decoded += 1
+                self.decode_ms = elapsed_ms if self.decoded == 1 else 0.9 * self.decode_ms + 0.1 * elapsed_ms
+            self.mutex.unlock()
+
+        cap.release()
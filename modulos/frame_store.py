@@ -0,0 +1,132 @@
+from collections import OrderedDict
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import cv2
+import numpy as np
+from PyQt6.QtGui import QImage
+
+
+class FrameRef:
+    """Lightweight handle to a frame kept in a FrameStore, resolved only when needed"""
+    __slots__ = ("store", "key", "shape")
+
+    def __init__(self, store, key, shape):
+        self.store = store
+        self.key = key
+        self.shape = shape
+
+    def image(self):
+        """Decoded BGR frame, or None if it is no longer available"""
+        return self.store.get(self.key)
+
+    def qimage(self):
+        frame = self.image()
+        if frame is None:
+            return None
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        return QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888).copy()
+
+    def __repr__(self):
+        return f"FrameRef({self.key[:12]}, {self.shape[1]}x{self.shape[0]})"
+
+
+class FrameStore:
+    """Content-addressed store of JPEG-encoded frames.
+
+    Identical frames share one entry no matter how many detections point at them.
+    When the in-memory budget is exceeded the oldest entries are spilled to disk"""
+
+    def __init__(self, max_memory_bytes=128 * 1024 * 1024, spill_to_disk=True,
+                 max_side=None, jpeg_quality=90):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_to_disk = spill_to_disk
+        self.max_side = max_side  # downscale stored frames to thumbnails, None keeps full resolution
+        self.jpeg_quality = jpeg_quality
+        self._memory = OrderedDict()  # key -> encoded bytes
+        self._on_disk = {}            # key -> file path
+        self._memory_bytes = 0
+        self._spill_dir = None
+        self._lock = threading.Lock()
+
+    def add(self, frame):
+        """Stores the frame (if not already stored) and returns a reference to it"""
+        if frame is None:
+            return None
+        frame = np.ascontiguousarray(frame)
+        digest = hashlib.blake2b(frame.data, digest_size=16)
+        digest.update(str(frame.shape).encode())
+        key = digest.hexdigest()
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return FrameRef(self, key, frame.shape)
+            if key in self._on_disk:
+                return FrameRef(self, key, frame.shape)
+
+        stored = frame
+        if self.max_side and max(frame.shape[:2]) > self.max_side:
+            scale = self.max_side / max(frame.shape[:2])
+            stored = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", stored, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return None
+
+        with self._lock:
+            self._memory[key] = encoded.tobytes()
+            self._memory_bytes += len(self._memory[key])
+            self._shrink()
+        return FrameRef(self, key, frame.shape)
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            else:
+                path = self._on_disk.get(key)
+                if path is None:
+                    return None
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    return None
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def __len__(self):
+        return len(self._memory) + len(self._on_disk)
+
+    def stats(self):
+        with self._lock:
+            return {"in_memory": len(self._memory), "memory_bytes": self._memory_bytes,
+                    "on_disk": len(self._on_disk)}
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._on_disk.clear()
+            self._memory_bytes = 0
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def _shrink(self):
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            key, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+            if not self.spill_to_disk:
+                continue
+            try:
+                if self._spill_dir is None:
+                    self._spill_dir = tempfile.mkdtemp(prefix="isea_frames_")
+                path = os.path.join(self._spill_dir, key + ".jpg")
+                with open(path, "wb") as f:
+                    f.write(data)
+                self._on_disk[key] = path
+            except OSError as e:
+                print(f"Frame store spill failed: {e}")
@@ -0,0 +1,184 @@
+"""Spreads batch detection of many videos over a pool of worker processes.
+
+Each worker loads the YOLO model once and processes whole videos with
+batch_pipeline.process_video. Job state is kept in a JSON file in the output
+folder, so an interrupted run continues where it stopped"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+from .batch_pipeline import process_video
+
+STATE_FILE = "batch_jobs.json"
+
+# per-process globals, set by _init_worker
+_worker_model = None
+_worker_progress = None
+
+
+class JobState:
+    """Status of each video of a batch run: pending, running, done or failed"""
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = {}
+        try:
+            with open(path, "r") as f:
+                self.jobs = json.load(f).get("jobs", {})
+        except (OSError, ValueError):
+            pass
+        # jobs left running by an interrupted run start over
+        for job in self.jobs.values():
+            if job.get("status") == "running":
+                job["status"] = "pending"
+
+    def is_done(self, video_path):
+        return self.jobs.get(video_path, {}).get("status") == "done"
+
+    def set(self, video_path, status, **info):
+        job = self.jobs.setdefault(video_path, {})
+        job.update(info, status=status, updated=time.strftime("%Y-%m-%d %H:%M:%S"))
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"jobs": self.jobs}, f, indent=2)
+        os.replace(tmp_path, self.path)  # never leaves a half-written state file
+
+
+def cpu_sets(workers, threads_per_worker):
+    """Core lists, one per worker, or None where the platform has no affinity support.
+
+    Consecutive slices of the cores taken cyclically: disjoint while workers x threads fit
+    in the machine, wrapping around to the first cores otherwise"""
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * workers
+    cores = sorted(os.sched_getaffinity(0))
+    per_worker = min(max(1, threads_per_worker), len(cores))
+    return [[cores[(i * per_worker + j) % len(cores)] for j in range(per_worker)]
+            for i in range(workers)]
+
+
+def _init_worker(model_path, threads, cores_per_worker, worker_counter, progress_q):
+    global _worker_model, _worker_progress
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+
+    cores = cores_per_worker[worker_index % len(cores_per_worker)]
+    if cores:
+        os.sched_setaffinity(0, cores)
+
+    # limits the intra-op threads so the workers do not oversubscribe the CPU
+    # (OMP_NUM_THREADS is set by run_jobs, before cv2 is imported here through batch_pipeline)
+    import cv2
+    import torch
+    from ultralytics import YOLO
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+
+    _worker_model = YOLO(model_path)
+    _worker_progress = progress_q
+
+
+def _run_job(video_path, options):
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if now - last[0] >= 1.0 or done >= total:
+            last[0] = now
+            _worker_progress.put((video_path, done, total))
+
+    try:
+        stats = process_video(_worker_model, video_path, progress=progress, **options)
+        return video_path, stats, None
+    except Exception as e:
+        return video_path, None, str(e)
+
+
+def run_jobs(model_path, videos, output_dir, workers, threads_per_worker=None, pin_cpus=False,
+             overwrite=False, log=print, **options):
+    """Processes videos on `workers` processes. options are passed to process_video.
+    Returns the JobState"""
+    os.makedirs(output_dir, exist_ok=True)
+    state = JobState(os.path.join(output_dir, STATE_FILE))
+    pending = [v for v in videos if overwrite or not state.is_done(v)]
+    for video_path in videos:
+        if video_path not in pending:
+            log(f"{os.path.basename(video_path)}: already processed, skipping")
+    if not pending:
+        return state
+
+    workers = max(1, min(workers, len(pending)))
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    cores = cpu_sets(workers, threads) if pin_cpus else [None] * workers
+
+    # spawn: CUDA and the tracker state must not be inherited through fork
+    context = mp.get_context("spawn")
+    progress_q = context.Queue()
+    worker_counter = context.Value("i", 0)
+    options = dict(options, output_dir=output_dir)
+    # spawned workers inherit the environment, OpenMP reads it when it is first loaded there
+    previous_omp = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+    progress = {}  # video_path -> (done, total)
+    start = time.perf_counter()
+    last_report = 0.0
+    finished = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(model_path, threads, cores, worker_counter, progress_q)) as pool:
+        futures = set()
+        try:
+            for video_path in pending:
+                state.set(video_path, "pending")
+                futures.add(pool.submit(_run_job, video_path, options))
+        finally:
+            # every worker is started by the submits, the parent gets its own setting back
+            if previous_omp is None:
+                os.environ.pop("OMP_NUM_THREADS", None)
+            else:
+                os.environ["OMP_NUM_THREADS"] = previous_omp
+
+        while futures:
+            done, futures = wait(futures, timeout=1.0, return_when=FIRST_COMPLETED)
+            while True:
+                try:
+                    video_path, frames_done, frames_total = progress_q.get_nowait()
+                except queue.Empty:
+                    break
+                if video_path not in progress:
+                    state.set(video_path, "running")
+                progress[video_path] = (frames_done, frames_total)
+
+            for future in done:
+                try:
+                    video_path, stats, error = future.result()
+                except Exception as e:
+                    # the worker died (e.g. the model failed to load), the pool is unusable
+                    for video_path in pending:
+                        if not state.is_done(video_path):
+                            state.set(video_path, "failed", error=str(e))
+                    log(f"Worker pool failed: {e}")
+                    return state
+                finished += 1
+                if error is None:
+                    state.set(video_path, "done", stats=stats)
+                    log(f"[{finished}/{len(pending)}] {os.path.basename(video_path)}: "
+                        f"{stats['inferred']} frames, {stats['detections']} detections, {stats['fps']:.1f} fps")
+                else:
+                    state.set(video_path, "failed", error=error)
+                    log(f"[{finished}/{len(pending)}] {os.path.basename(video_path)}: failed: {error}")
+
+            now = time.perf_counter()
+            if now - last_report >= 10.0 and futures:
+                last_report = now
+                frames_done = sum(done_frames for done_frames, _ in progress.values())
+                frames_total = sum(total for _, total in progress.values())
+                log(f"{finished}/{len(pending)} videos | {frames_done}/{frames_total} frames of started videos | "
+                    f"{frames_done / (now - start):.1f} fps overall")
+    return state
@@ -0,0 +1,156 @@
+from bisect import bisect_right
+import hashlib
+import json
+import os
+from pathlib import Path
+import cv2
+from PyQt6.QtCore import QThread, pyqtSignal
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".isea_index.json"
+# without an index, frames this close ahead are decoded forward instead of seeking
+MAX_FORWARD_GRABS = 30
+
+
+class KeyframeIndex:
+    """Keyframe positions of a video, so seeks can jump to a keyframe and decode forward"""
+
+    def __init__(self, video_path, keyframes, frame_count):
+        self.video_path = video_path
+        self.keyframes = sorted(set(keyframes)) or [0]
+        self.frame_count = frame_count
+
+    @staticmethod
+    def index_paths(video_path):
+        """Cache file next to the video, with a fallback in the user folder for read-only media"""
+        fallback_dir = Path.home() / ".isea" / "index"
+        digest = hashlib.blake2b(os.path.abspath(video_path).encode("utf-8"), digest_size=8).hexdigest()
+        return [video_path + INDEX_SUFFIX, str(fallback_dir / f"{Path(video_path).stem}_{digest}.json")]
+
+    @staticmethod
+    def _signature(video_path):
+        stat = os.stat(video_path)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    @classmethod
+    def load(cls, video_path):
+        """Returns the cached index or None if it is missing or the video changed"""
+        try:
+            signature = cls._signature(video_path)
+        except OSError:
+            return None
+
+        for path in cls.index_paths(video_path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get("version") == INDEX_VERSION and data.get("signature") == signature:
+                return cls(video_path, data["keyframes"], data["frame_count"])
+        return None
+
+    def save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "signature": self._signature(self.video_path),
+            "frame_count": self.frame_count,
+            "keyframes": self.keyframes,
+        }
+        for path in self.index_paths(self.video_path):
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                with open(path, "w") as f:
+                    json.dump(data, f)
+                return path
+            except OSError:
+                continue
+        return None
+
+    @classmethod
+    def scan(cls, video_path, should_stop=None):
+        """Reads the packets of the video without decoding them and records the keyframes.
+        Needs the FFmpeg backend (OpenCV >= 4.7), returns None when unsupported"""
+        if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+            return None
+
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+        try:
+            # raw mode: grab() returns encoded packets, nothing is decoded
+            if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+                return None
+
+            keyframes = []
+            frame_num = 0
+            while cap.grab():
+                if should_stop is not None and should_stop():
+                    return None
+                if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME) > 0:
+                    keyframes.append(frame_num)
+                frame_num += 1
+        finally:
+            cap.release()
+
+        if not keyframes:
+            return None
+        return cls(video_path, keyframes, frame_num)
+
+    def keyframe_before(self, frame_num):
+        """Closest keyframe at or before frame_num"""
+        i = bisect_right(self.keyframes, frame_num) - 1
+        return self.keyframes[max(i, 0)]
+
+    def nearest_keyframe(self, frame_num):
+        i = bisect_right(self.keyframes, frame_num)
+        before = self.keyframes[max(i - 1, 0)]
+        after = self.keyframes[i] if i < len(self.keyframes) else before
+        return before if frame_num - before <= after - frame_num else after
+
+
+def seek_capture(cap, frame_num, index=None):
+    """Positions cap so the next read() returns frame_num.
+
+    Frames ahead in the same GOP are reached by decoding forward from the current
+    position, anything else jumps to the preceding keyframe and decodes forward"""
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if position == frame_num:
+        return True
+
+    if index is not None:
+        start = index.keyframe_before(frame_num)
+        if not (start <= position < frame_num):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            position = start
+    elif not (0 < frame_num - position <= MAX_FORWARD_GRABS):
+        return cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+
+    for _ in range(frame_num - position):
+        if not cap.grab():
+            return False
+    return True
+
+
+class KeyframeIndexThread(QThread):
+    """Loads the keyframe index from disk or builds it in the background"""
+    index_ready = pyqtSignal(object)  # KeyframeIndex
+
+    def __init__(self, video_path, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+    def run(self):
+        try:
+            index = KeyframeIndex.load(self.video_path)
+            if index is None:
+                index = KeyframeIndex.scan(self.video_path, should_stop=lambda: not self.running)
+                if index is not None:
+                    index.save()
+            if index is not None and self.running:
+                self.index_ready.emit(index)
+        except Exception as e:
+            print(f"Keyframe index error: {e}")
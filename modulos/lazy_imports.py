@@ -0,0 +1,59 @@
+"""Heavy dependencies imported on first use instead of when the application starts.
+
+    from .lazy_imports import torch, YOLO
+    torch.cuda.is_available()   # torch is imported here, the first time it is needed
+"""
+import importlib
+import threading
+
+_lock = threading.RLock()
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+class LazyAttribute:
+    """Stands in for a class or function of a lazily imported module, e.g. YOLO"""
+
+    def __init__(self, module, attr):
+        self._module = module
+        self._attr = attr
+
+    def __call__(self, *args, **kwargs):
+        return getattr(self._module, self._attr)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self._module._name}.{self._attr}>"
+
+
+torch = LazyModule("torch")
+pd = LazyModule("pandas")
+yaml = LazyModule("yaml")
+ultralytics = LazyModule("ultralytics")
+sam_models = LazyModule("ultralytics.models.sam")
+
+YOLO = LazyAttribute(ultralytics, "YOLO")
+SAM = LazyAttribute(ultralytics, "SAM")
@@ -0,0 +1,145 @@
+"""Storage and polygon conversion of SAM 2 binary masks.
+
+Masks are kept and contoured only inside their bounding box, so memory and time
+follow the object size and not the frame resolution"""
+import cv2
+import numpy as np
+
+DEFAULT_TOLERANCE = 1.0      # approxPolyDP epsilon in pixels
+DEFAULT_MAX_VERTICES = 200   # per component, the tolerance grows until it fits
+MIN_COMPONENT_AREA = 16.0    # pixels, smaller components and holes are noise
+
+
+def binarize(mask):
+    """uint8 0/1 mask from a bool, 0/1 or probability mask"""
+    if mask.dtype == np.bool_:
+        return mask.view(np.uint8)
+    return (mask > 0.5).astype(np.uint8)
+
+
+def crop_to_content(mask):
+    """(crop, (x, y)) of the bounding box of the non-zero pixels, (None, None) for an empty mask"""
+    binary = binarize(mask)
+    rows = np.flatnonzero(binary.any(axis=1))
+    if rows.size == 0:
+        return None, None
+    cols = np.flatnonzero(binary[rows[0]:rows[-1] + 1].any(axis=0))
+    return binary[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], (int(cols[0]), int(rows[0]))
+
+
+class CompactMask:
+    """Binary mask stored as its bounding box crop, bit-packed (8 pixels per byte)"""
+    __slots__ = ("shape", "offset", "roi_shape", "bits")
+
+    def __init__(self, shape, offset, roi_shape, bits):
+        self.shape = tuple(shape)          # (h, w) of the frame
+        self.offset = tuple(offset)        # (x, y) of the crop in the frame
+        self.roi_shape = tuple(roi_shape)  # (h, w) of the crop
+        self.bits = bits
+
+    @classmethod
+    def from_mask(cls, mask):
+        crop, offset = crop_to_content(mask)
+        if crop is None:
+            return cls(mask.shape[:2], (0, 0), (0, 0), np.empty(0, dtype=np.uint8))
+        return cls(mask.shape[:2], offset, crop.shape, np.packbits(crop))
+
+    @property
+    def empty(self):
+        return self.roi_shape[0] == 0
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def bbox(self):
+        """(x1, y1, x2, y2) of the crop, x2/y2 exclusive"""
+        (x, y), (h, w) = self.offset, self.roi_shape
+        return x, y, x + w, y + h
+
+    def roi(self):
+        """The crop as a 0/1 uint8 array"""
+        h, w = self.roi_shape
+        return np.unpackbits(self.bits, count=h * w).reshape(h, w)
+
+    def to_mask(self):
+        """Full-frame bool mask"""
+        mask = np.zeros(self.shape, dtype=bool)
+        if not self.empty:
+            x1, y1, x2, y2 = self.bbox()
+            mask[y1:y2, x1:x2] = self.roi().view(bool)
+        return mask
+
+
+def simplify(contour, tolerance=DEFAULT_TOLERANCE, max_vertices=DEFAULT_MAX_VERTICES):
+    """Douglas-Peucker simplification of an (N, 2) contour to at most max_vertices points"""
+    epsilon = tolerance
+    points = contour.reshape(-1, 1, 2)
+    while True:
+        approx = cv2.approxPolyDP(points, epsilon, True)
+        if len(approx) <= max_vertices or len(approx) <= 3:
+            return approx.reshape(-1, 2)
+        epsilon *= 1.5
+
+
+def bridge(polygon, other):
+    """Splices other into polygon through a zero-width cut between their closest vertices.
+
+    Gives one simple ring for an outer contour and a hole, or for two components"""
+    distances = ((polygon[:, None, :] - other[None, :, :]) ** 2).sum(axis=2)
+    i, j = np.unravel_index(np.argmin(distances), distances.shape)
+    other = np.roll(other, -j, axis=0)
+    return np.concatenate([polygon[:i + 1], other, other[:1], polygon[i:]])
+
+
+def mask_to_polygons(mask, offset=(0, 0), tolerance=DEFAULT_TOLERANCE, max_vertices=DEFAULT_MAX_VERTICES,
+                     min_area=MIN_COMPONENT_AREA):
+    """Pixel polygons of the components of a mask (or mask crop at offset), largest first.
+
+    Holes are bridged into the ring of the component that contains them"""
+    binary = np.ascontiguousarray(binarize(mask))
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE, offset=offset)
+    if hierarchy is None:
+        return []
+    hierarchy = hierarchy[0]  # next, previous, first child, parent
+
+    components = []
+    for i, (_, _, child, parent) in enumerate(hierarchy):
+        if parent != -1:
+            continue  # a hole, handled with its outer contour
+        area = cv2.contourArea(contours[i])
+        if area < min_area:
+            continue
+        polygon = simplify(contours[i], tolerance, max_vertices)
+        while child != -1:
+            if cv2.contourArea(contours[child]) >= min_area:
+                polygon = bridge(polygon, simplify(contours[child], tolerance, max_vertices))
+            child = hierarchy[child][0]
+        components.append((area, polygon))
+
+    components.sort(key=lambda c: c[0], reverse=True)
+    return [polygon for _, polygon in components]
+
+
+def merge_polygons(polygons):
+    """One ring joining all polygons, as a YOLO segmentation label holds one polygon per object"""
+    if not polygons:
+        return np.empty((0, 2), dtype=np.int32)
+    merged = polygons[0]
+    for polygon in polygons[1:]:
+        merged = bridge(merged, polygon)
+    return merged
+
+
+def mask_to_yolo_polygon(mask, tolerance=DEFAULT_TOLERANCE, max_vertices=DEFAULT_MAX_VERTICES):
+    """Normalised (x/w, y/h) polygon of a full-frame or CompactMask mask and its number of components"""
+    if not isinstance(mask, CompactMask):
+        mask = CompactMask.from_mask(mask)
+    h, w = mask.shape
+    if mask.empty:
+        return None, 0
+    polygons = mask_to_polygons(mask.roi(), mask.offset, tolerance, max_vertices)
+    if not polygons:
+        return None, 0
+    merged = merge_polygons(polygons).astype(np.float32)
+    return (merged / np.array([w, h], dtype=np.float32)).tolist(), len(polygons)
@@ -0,0 +1,54 @@
+"""Export of YOLO weights to ONNX / OpenVINO for CPU inference.
+
+Exports are written next to the .pt by ultralytics and reused while they are newer
+than the weights, so a model is converted once per station"""
+import os
+from PyQt6.QtCore import QThread, pyqtSignal
+from .lazy_imports import YOLO
+
+ONNX = "onnx"
+OPENVINO = "openvino"
+
+
+def exported_path(weights_path, fmt, int8=False):
+    """Where ultralytics writes the export of weights_path"""
+    stem = os.path.splitext(weights_path)[0]
+    if fmt == ONNX:
+        return stem + ".onnx"
+    return stem + ("_int8" if int8 else "") + "_openvino_model"
+
+
+def find_exported(weights_path):
+    """Fastest CPU export of the weights that is not older than them, or None"""
+    if not weights_path or not weights_path.endswith(".pt") or not os.path.exists(weights_path):
+        return None
+    weights_time = os.path.getmtime(weights_path)
+    for fmt, int8 in ((OPENVINO, True), (OPENVINO, False), (ONNX, False)):
+        path = exported_path(weights_path, fmt, int8)
+        if os.path.exists(path) and os.path.getmtime(path) >= weights_time:
+            return path
+    return None
+
+
+class ModelExportThread(QThread):
+    """Converts YOLO weights off the GUI thread"""
+    export_finished = pyqtSignal(str)  # path of the exported model
+    error = pyqtSignal(str)
+
+    def __init__(self, weights_path, fmt, int8=False, data=None, parent=None):
+        super().__init__(parent)
+        self.weights_path = weights_path
+        self.fmt = fmt
+        self.int8 = int8 and fmt == OPENVINO  # ultralytics quantizes OpenVINO exports only (NNCF)
+        self.data = data                      # dataset.yaml whose images calibrate INT8
+
+    def run(self):
+        try:
+            arguments = dict(format=self.fmt, dynamic=True)  # batches of frames and tiles of any size
+            if self.int8:
+                arguments.update(int8=True, data=self.data)
+            # its own instance, the loaded model keeps running detection meanwhile
+            path = YOLO(self.weights_path).export(**arguments)
+            self.export_finished.emit(str(path))
+        except Exception as e:
+            self.error.emit(str(e))
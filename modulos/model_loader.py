@@ -0,0 +1,31 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from .lazy_imports import YOLO, torch
+from .model_export import find_exported
+
+
+class ModelLoaderThread(QThread):
+    """Loads YOLO weights off the GUI thread, with their ONNX/OpenVINO export on CPU-only machines"""
+    model_ready = pyqtSignal(object, object, str)  # model, exported CPU model or None, model_path
+    error = pyqtSignal(str)
+
+    def __init__(self, weights_path, model_path, parent=None):
+        super().__init__(parent)
+        self.weights_path = weights_path  # file to load
+        self.model_path = model_path      # name shown to the user
+
+    def run(self):
+        try:
+            model = YOLO(self.weights_path)
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+
+        cpu_model = None
+        exported = find_exported(self.weights_path)
+        if exported is not None and not torch.cuda.is_available():
+            try:
+                cpu_model = YOLO(exported, task=model.task)
+            except Exception as e:
+                # the PyTorch model still works, only slower
+                print("ModelLoaderThread: could not load", exported, e)
+        self.model_ready.emit(model, cpu_model, self.model_path)
@@ -0,0 +1,81 @@
+"""Novelty gate for continuous detection: frames too close to what was already
+detected are not sent to the model. Runs on a small grey thumbnail, so it is cheap
+enough for the decode thread"""
+from collections import deque
+import cv2
+import numpy as np
+
+OFF = "off"
+PHASH = "phash"            # Hamming distance of 64-bit perceptual hashes to the last novel frames
+FLOW = "flow"              # mean Farneback flow magnitude since the last novel frame, fraction of the width
+BACKGROUND = "background"  # MOG2 foreground fraction
+
+METHODS = (OFF, PHASH, FLOW, BACKGROUND)
+DEFAULT_THRESHOLDS = {PHASH: 6.0, FLOW: 0.02, BACKGROUND: 0.005}
+
+
+def perceptual_hash(gray):
+    """64-bit DCT hash of a grey image"""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    bits = low > np.median(low)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class MotionGate:
+    """update(frame) tells whether a frame is novel. Novel frames become the new reference"""
+
+    def __init__(self, method=PHASH, threshold=None, window=8, width=160):
+        self.method = method
+        self.threshold = DEFAULT_THRESHOLDS.get(method, 0.0) if threshold is None else threshold
+        self.window = window  # phash: novel only if far from each of the last `window` novel frames
+        self.width = width
+        self.evaluated = 0
+        self.novel = 0
+        self.reset()
+
+    def reset(self):
+        """Forgets the reference, e.g. after a seek: the next frame is always novel"""
+        self._hashes = deque(maxlen=self.window)
+        self._reference = None
+        self._subtractor = None
+
+    def update(self, frame):
+        """(novel, score) for a BGR frame"""
+        if self.method == OFF:
+            return True, 0.0
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if self.method == PHASH:
+            frame_hash = perceptual_hash(gray)
+            score = float(min((hamming(frame_hash, other) for other in self._hashes), default=64))
+            novel = score > self.threshold
+            if novel:
+                self._hashes.append(frame_hash)
+        elif self.method == FLOW:
+            if self._reference is None:
+                score = float("inf")
+            else:
+                flow = cv2.calcOpticalFlowFarneback(self._reference, gray, None, 0.5, 2, 9, 2, 5, 1.1, 0)
+                score = float(np.mean(np.hypot(flow[..., 0], flow[..., 1]))) / self.width
+            novel = score > self.threshold
+            if novel:
+                self._reference = gray
+        else:
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=16,
+                                                                      detectShadows=False)
+            foreground = self._subtractor.apply(gray)
+            score = cv2.countNonZero(foreground) / foreground.size
+            # the model has not seen anything yet on the first frame
+            novel = score > self.threshold or self.evaluated == 0
+
+        self.evaluated += 1
+        self.novel += novel
+        return novel, score
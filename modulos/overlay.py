@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+from PyQt6.QtGui import QImage, QPixmap, QPainter
+from .mask_utils import CompactMask
+
+# RGB colours given to masks that have no colour of their own
+MASK_PALETTE = [(0, 255, 0), (255, 165, 0), (0, 200, 255), (255, 0, 255), (255, 255, 0), (120, 80, 255)]
+
+
+class OverlayCompositor:
+    """Blends masks, boxes and points onto a frame, touching only their bounding boxes.
+
+    The frame is converted once per set_frame. compose() restores the areas changed by
+    the previous call from the base, blends the new overlays in their ROIs and patches
+    just those areas into the cached pixmap"""
+
+    def __init__(self, alpha=0.4):
+        self.alpha = alpha
+        self.key = None
+        self.base = None      # RGB frame
+        self.composed = None  # base + current overlays
+        self.pixmap = None
+        self._dirty = []      # (x1, y1, x2, y2) areas where composed differs from base
+
+    def set_frame(self, frame, key=None):
+        """New base frame (BGR). Nothing is redone when key matches the current frame"""
+        if key is not None and key == self.key and self.base is not None:
+            return
+        self.key = key
+        self.base = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.composed = self.base.copy()
+        h, w = self.base.shape[:2]
+        self.pixmap = QPixmap.fromImage(QImage(self.base.data, w, h, 3 * w, QImage.Format.Format_RGB888))
+        self._dirty = []
+
+    def compose(self, masks=(), boxes=(), points=()):
+        """masks: [(mask or CompactMask, rgb or None)], boxes: [((x1, y1, x2, y2), rgb)],
+        points: [((x, y), rgb)]. Returns the pixmap of the frame with these overlays only"""
+        for x1, y1, x2, y2 in self._dirty:
+            self.composed[y1:y2, x1:x2] = self.base[y1:y2, x1:x2]
+        changed = list(self._dirty)
+        self._dirty = []
+
+        for i, (mask, color) in enumerate(masks):
+            if not isinstance(mask, CompactMask):
+                mask = CompactMask.from_mask(mask)
+            if mask.empty or mask.shape != self.base.shape[:2]:
+                continue
+            x1, y1, x2, y2 = mask.bbox()
+            roi = self.composed[y1:y2, x1:x2]
+            selected = mask.roi().view(bool)
+            color = np.array(color or MASK_PALETTE[i % len(MASK_PALETTE)], dtype=np.float32)
+            roi[selected] = (roi[selected] * (1 - self.alpha) + color * self.alpha).astype(np.uint8)
+            self._dirty.append((x1, y1, x2, y2))
+
+        h, w = self.base.shape[:2]
+        for (x1, y1, x2, y2), color in boxes:
+            x1, y1, x2, y2 = (int(v) for v in (x1, y1, x2, y2))
+            cv2.rectangle(self.composed, (x1, y1), (x2, y2), color, 2)
+            self._dirty.append(self._clip((x1 - 2, y1 - 2, x2 + 3, y2 + 3), w, h))
+
+        for (x, y), color in points:
+            x, y = int(x), int(y)
+            cv2.circle(self.composed, (x, y), 5, color, -1)
+            cv2.circle(self.composed, (x, y), 5, (255, 255, 255), 1)
+            self._dirty.append(self._clip((x - 7, y - 7, x + 8, y + 8), w, h))
+
+        self._patch_pixmap(changed + self._dirty)
+        return self.pixmap
+
+    def _patch_pixmap(self, areas):
+        painter = QPainter(self.pixmap)
+        for x1, y1, x2, y2 in areas:
+            if x2 <= x1 or y2 <= y1:
+                continue
+            patch = np.ascontiguousarray(self.composed[y1:y2, x1:x2])
+            painter.drawImage(x1, y1, QImage(patch.data, x2 - x1, y2 - y1, 3 * (x2 - x1),
+                                             QImage.Format.Format_RGB888))
+        painter.end()
+
+    @staticmethod
+    def _clip(area, w, h):
+        x1, y1, x2, y2 = area
+        return max(0, x1), max(0, y1), min(w, x2), min(h, y2)
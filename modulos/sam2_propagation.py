@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import cv2
+from PyQt6.QtCore import QThread, pyqtSignal
+from .keyframe_index import KeyframeIndex, seek_capture
+from .lazy_imports import torch, sam_models
+from .mask_utils import CompactMask
+
+
+class SAM2PropagationThread(QThread):
+    """Tracks a SAM 2 mask from one frame over the frames before and after it.
+
+    SAM 2's video predictor only prompts the first frame of a video source, so each
+    direction is written to a short temporary clip that starts at the prompted frame
+    (the backward clip in reverse order)"""
+    mask_ready = pyqtSignal(int, object, float)  # frame_num, CompactMask, score
+    progress = pyqtSignal(int, int)  # frames done, total
+    finished_propagation = pyqtSignal(int)  # number of masks emitted
+    error = pyqtSignal(str)
+
+    def __init__(self, video_path, frame_num, box=None, points=(), frames_before=0, frames_after=100,
+                 model_name="sam2.1_b.pt", parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.frame_num = frame_num
+        self.box = box
+        self.points = list(points)
+        self.frames_before = frames_before
+        self.frames_after = frames_after
+        self.model_name = model_name
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        work_dir = tempfile.mkdtemp(prefix="isea_sam2_")
+        emitted = 0
+        try:
+            cap = cv2.VideoCapture(self.video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            first = max(0, self.frame_num - self.frames_before)
+            last = min(frame_count - 1, self.frame_num + self.frames_after) if frame_count > 0 \
+                else self.frame_num + self.frames_after
+
+            # JPEG-encoded while reading, the backward clip needs the range in reverse
+            encoded = {}
+            seek_capture(cap, first, KeyframeIndex.load(self.video_path))
+            for frame_num in range(first, last + 1):
+                if self.cancelled:
+                    return
+                ret, frame = cap.read()
+                if not ret:
+                    last = frame_num - 1
+                    break
+                encoded[frame_num] = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])[1]
+            cap.release()
+            if self.frame_num not in encoded:
+                self.error.emit(f"Could not read frame {self.frame_num}")
+                return
+
+            predictor = sam_models.SAM2VideoPredictor(overrides=dict(
+                conf=0.25, task="segment", mode="predict", imgsz=1024, model=self.model_name,
+                device="cuda" if torch.cuda.is_available() else "cpu", verbose=False))
+
+            total = last - first  # the prompted frame already has its mask
+            done = 0
+            forward = list(range(self.frame_num, last + 1))
+            backward = list(range(self.frame_num, first - 1, -1))
+            for direction, frame_nums in (("forward", forward), ("backward", backward)):
+                if len(frame_nums) < 2:
+                    continue
+                clip_path = self._write_clip(os.path.join(work_dir, f"{direction}.avi"),
+                                             [encoded[n] for n in frame_nums], fps)
+                for frame_num, result in zip(frame_nums, predictor(source=clip_path, stream=True,
+                                                                   **self._prompts())):
+                    if self.cancelled:
+                        return
+                    # the prompted frame comes first in both clips
+                    if frame_num == self.frame_num:
+                        continue
+                    masks = result.masks
+                    if masks is not None and len(masks.data) > 0:
+                        score = float(result.boxes.conf[0]) if result.boxes is not None and len(result.boxes) else 1.0
+                        # packed here, hundreds of full-frame masks would otherwise pile up in the GUI queue
+                        mask = CompactMask.from_mask(masks.data[0].bool().cpu().numpy())
+                        self.mask_ready.emit(frame_num, mask, score)
+                        emitted += 1
+                    done += 1
+                    self.progress.emit(done, total)
+                # the memory bank of one direction must not leak into the other
+                predictor.inference_state = {}
+        except Exception as e:
+            print(f"SAM 2 propagation error: {e}")
+            self.error.emit(str(e))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self.finished_propagation.emit(emitted)
+
+    def _prompts(self):
+        prompts = {}
+        if self.box is not None:
+            prompts["bboxes"] = [list(map(float, self.box))]
+        if self.points:
+            prompts["points"] = [[[float(x), float(y)] for x, y, _ in self.points]]
+            prompts["labels"] = [[int(label) for _, _, label in self.points]]
+        return prompts
+
+    @staticmethod
+    def _write_clip(path, encoded_frames, fps):
+        writer = None
+        for data in encoded_frames:
+            frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if writer is None:
+                h, w = frame.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+            writer.write(frame)
+        if writer is not None:
+            writer.release()
+        return path
@@ -1,50 +1,133 @@
+from collections import OrderedDict
+import hashlib
+import itertools
 from PyQt6.QtCore import QThread, pyqtSignal, QMutex, QWaitCondition
-from ultralytics import SAM
 import numpy as np
-import torch
+from .lazy_imports import torch, sam_models
+from .mask_utils import CompactMask
 
 class SAM2Thread(QThread):
     mask_finished = pyqtSignal(dict, object, int)  # mask_data, original_frame, frame_num
     error = pyqtSignal(str)
+    model_loading = pyqtSignal()
+    model_ready = pyqtSignal(str)  # device
     
-    def __init__(self, model_name="sam2.1_b.pt", parent=None):
+    def __init__(self, model_name="sam2.1_b.pt", parent=None, max_cached_embeddings=8):
         super().__init__(parent)
-        self.model = None
-        self.current_frame = None
-        self.current_frame_num = 0
-        self.prompts = []  # [(x, y, type)] where type: 1=foreground, 0=background
+        self.model = None  # SAM2Predictor, None until loaded
+        # refinement session of one frame: the box and the clicks accumulate until it is reset
+        self.session = None  # {"id", "frame", "frame_num", "box", "points": [(x, y, label)], "logits"}
+        self.session_ids = itertools.count(1)
+        self.pending = False  # the session changed since the last inference
+        # every change of the session is a request, only the result of the latest one is shown
+        self.latest_request = 0
+        self.superseded_requests = 0  # inferences skipped or results dropped because of a newer request
         self.running = True
         self.mutex = QMutex()
         self.condition = QWaitCondition()
         self.model_name = model_name
-        self.cuda_available = torch.cuda.is_available()
-        self.load_model()
+        self.cuda_available = False
+
+        # image encoder output per frame, so further clicks on a frame only run the prompt decoder
+        self.embeddings = OrderedDict()  # frame digest -> predictor features
+        self.max_cached_embeddings = max_cached_embeddings
+        self.embedding_hits = 0
+        self.embedding_misses = 0
 
     def load_model(self):
-        """Load SAM 2 model"""
+        """Load SAM 2 model. Runs on this thread, the GUI never waits for it"""
+        self.model_loading.emit()
         try:
+            self.cuda_available = torch.cuda.is_available()
             device = 'cuda' if self.cuda_available else 'cpu'
-            self.model = SAM(self.model_name)
-            self.model.to(device)
+            # the predictor (not SAM.predict) lets the image encoder and the prompt decoder run separately
+            self.model = sam_models.SAM2Predictor(overrides=dict(
+                conf=0.25, task="segment", mode="predict", imgsz=1024,
+                model=self.model_name, device=device, verbose=False))
+            self.model.setup_model(model=None)
+            self._keep_low_res_output()
             print(f"SAM 2 model loaded on {device}")
+            self.model_ready.emit(device)
         except Exception as e:
             print(f"Failed to load SAM 2: {e}")
             self.error.emit(str(e))
 
     def set_frame_and_prompts(self, frame: np.ndarray, frame_num: int, prompts: list):
-        """Set frame and prompts for segmentation"""
+        """Starts a new session from a box array ([[x1, y1, x2, y2]]) or points ([(x, y, type)])"""
+        prompts = np.asarray(prompts, dtype=np.float32)
+        if prompts.ndim == 2 and prompts.shape[1] == 4:
+            self.start_session(frame, frame_num, prompts[0])
+        else:
+            self.start_session(frame, frame_num)
+            for x, y, label in prompts.reshape(-1, 3):
+                self.add_point(frame, frame_num, x, y, int(label))
+
+    def start_session(self, frame: np.ndarray, frame_num: int, box=None):
+        """Drops the previous clicks and segments the frame again from the box alone"""
+        self.mutex.lock()
+        self.session = {
+            "id": next(self.session_ids),
+            "frame": frame,
+            "frame_num": frame_num,
+            "box": None if box is None else np.asarray(box, dtype=np.float32).reshape(4),
+            "points": [],
+            "logits": None,
+            "undos": 0,
+        }
+        self.latest_request += 1
+        self.pending = box is not None
+        if self.pending:
+            self.condition.wakeOne()
+        self.mutex.unlock()
+
+    def add_point(self, frame: np.ndarray, frame_num: int, x, y, label=1):
+        """Adds a foreground (1) or background (0) click to the session of this frame"""
         self.mutex.lock()
-        self.current_frame = frame
-        self.current_frame_num = frame_num
-        self.prompts = prompts
-        self.prompt_type = "points"
+        if self.session is None or self.session["frame_num"] != frame_num:
+            self.mutex.unlock()
+            self.start_session(frame, frame_num)
+            self.mutex.lock()
+        self.session["points"].append((float(x), float(y), int(label)))
+        self.latest_request += 1
+        self.pending = True
         self.condition.wakeOne()
         self.mutex.unlock()
 
+    def undo_point(self):
+        """Removes the last click. Returns False if there was none"""
+        self.mutex.lock()
+        try:
+            if self.session is None or not self.session["points"]:
+                return False
+            self.session["points"].pop()
+            # the previous mask already includes the removed click
+            self.session["logits"] = None
+            self.session["undos"] += 1
+            self.latest_request += 1
+            self.pending = self.session["box"] is not None or bool(self.session["points"])
+            if self.pending:
+                self.condition.wakeOne()
+            return True
+        finally:
+            self.mutex.unlock()
+
+    def reset_session(self):
+        self.mutex.lock()
+        self.session = None
+        self.latest_request += 1  # drops the result of an inference still running
+        self.pending = False
+        self.mutex.unlock()
+
+    def is_latest(self, request_id):
+        return request_id == self.latest_request
+
     def clear_prompts(self):
         """Clear all prompts"""
+        self.reset_session()
+
+    def clear_embeddings(self):
         self.mutex.lock()
-        self.prompts = []
+        self.embeddings.clear()
         self.mutex.unlock()
 
     def stop(self):
@@ -55,44 +138,65 @@ class SAM2Thread(QThread):
         self.wait()
 
     def run(self):
+        # loading starts as soon as the thread is started (first use of SAM)
+        self.load_model()
         while True:
             self.mutex.lock()
-            while self.current_frame is None and self.running:
+            while not self.pending and self.running:
                 self.condition.wait(self.mutex)
             
             if not self.running:
                 self.mutex.unlock()
                 break
-                
-            frame = self.current_frame.copy()
-            frame_num = self.current_frame_num
-            prompts = self.prompts.copy()
-            self.current_frame = None
+
+            # snapshot: clicks arriving during the inference are handled by the next one
+            session = self.session
+            frame = session["frame"].copy()
+            frame_num = session["frame_num"]
+            box = session["box"]
+            points = list(session["points"])
+            logits = session["logits"]
+            undos = session["undos"]
+            request_id = self.latest_request
+            self.pending = False
             self.mutex.unlock()
 
             if self.model is None:
                 continue
 
             try:
-                device = 'cuda' if self.cuda_available else 'cpu'
-        
-                results = self.model.predict(
-                frame,
-                bboxes=prompts,  # SAM aceita bboxes
-                device=device,
-                verbose=False
-            )
+                self.set_image(frame)
+                if not self.is_latest(request_id):
+                    # superseded while the encoder ran: the next request decodes with its own prompts
+                    self.superseded_requests += 1
+                    continue
+                self.low_res_output = None
+                results = self.model(**self.prompt_arguments(box, points, logits))
                 
                 if results and len(results) > 0:
                     # Extract mask data
                     masks = results[0].masks
                     if masks is not None and len(masks.data) > 0:
-                        # SAM 2 doesn't have 'conf' attribute - use fixed confidence
+                        new_logits, scores = self.low_res_output or (None, None)
+                        self.mutex.lock()
+                        if self.session is session and session["undos"] == undos:
+                            # the next click refines this mask instead of starting from the prompts alone
+                            session["logits"] = new_logits
+                        self.mutex.unlock()
+                        if not self.is_latest(request_id):
+                            self.superseded_requests += 1
+                            continue
+
+                        segmentation = masks.data[0].bool().cpu().numpy()
                         mask_data = {
-                            "segmentation": masks.data[0].cpu().numpy(),
-                            "all_masks": [mask.cpu().numpy() for mask in masks.data],
-                            "scores": [0.95] * len(masks.data),  # Valor fixo de confiança
-                            "orig_shape": masks.orig_shape if hasattr(masks, 'orig_shape') else frame.shape[:2]
+                            "segmentation": segmentation,  # full frame, only for the preview
+                            "compact": CompactMask.from_mask(segmentation),
+                            "scores": scores.float().cpu().tolist() if scores is not None else [0.95] * len(masks.data),
+                            "orig_shape": masks.orig_shape if hasattr(masks, 'orig_shape') else frame.shape[:2],
+                            "session_id": session["id"],
+                            "request_id": request_id,
+                            "box": box,
+                            "points": points,
                         }
                         self.mask_finished.emit(mask_data, frame, frame_num)
                     else:
@@ -101,4 +205,55 @@ class SAM2Thread(QThread):
             except Exception as e:
                 error_msg = f"SAM 2 error: {str(e)}"
                 print(error_msg)
-                self.error.emit(error_msg)
\ No newline at end of file
+                self.error.emit(error_msg)
+
+    def set_image(self, frame):
+        """Gives the predictor the frame, running the image encoder only if the frame is not cached"""
+        key = hashlib.blake2b(np.ascontiguousarray(frame).data, digest_size=16)
+        key.update(str(frame.shape).encode())
+        key = key.hexdigest()
+
+        self.mutex.lock()
+        features = self.embeddings.get(key)
+        if features is not None:
+            self.embeddings.move_to_end(key)
+        self.mutex.unlock()
+
+        if features is not None:
+            self.embedding_hits += 1
+            # same as set_image() without the encoder: the source is still needed for pre/postprocessing
+            self.model.setup_source(frame)
+            self.model.features = features
+            return
+
+        self.embedding_misses += 1
+        self.model.set_image(frame)
+        self.mutex.lock()
+        self.embeddings[key] = self.model.features
+        while len(self.embeddings) > self.max_cached_embeddings:
+            self.embeddings.popitem(last=False)
+        self.mutex.unlock()
+
+    def _keep_low_res_output(self):
+        """Keeps the decoder output (low-res mask logits, scores) that postprocess turns into binary masks"""
+        postprocess = self.model.postprocess
+
+        def keep_and_postprocess(preds, *args, **kwargs):
+            self.low_res_output = (preds[0].detach(), preds[1].detach())
+            return postprocess(preds, *args, **kwargs)
+        self.model.postprocess = keep_and_postprocess
+        self.low_res_output = None
+
+    @staticmethod
+    def prompt_arguments(box=None, points=(), logits=None):
+        """Predictor arguments for one object described by a box, clicks [(x, y, label)] and the previous mask"""
+        arguments = {}
+        if box is not None:
+            arguments["bboxes"] = np.asarray(box, dtype=np.float32).reshape(1, 4)
+        if points:
+            points = np.asarray(points, dtype=np.float32)
+            arguments["points"] = [points[:, :2].tolist()]
+            arguments["labels"] = [points[:, 2].astype(int).tolist()]
+        if logits is not None:
+            arguments["masks"] = logits[:1]  # (1, 256, 256) low-res logits
+        return arguments
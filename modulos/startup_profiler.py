@@ -0,0 +1,100 @@
+"""Startup timing for `python main.py --profile-startup`.
+
+Times every module imported by the main thread while enabled (cumulative and
+self time, like python -X importtime) and named sections such as widget
+construction. Imports of background threads, e.g. the model loader, are not
+part of startup and are left out"""
+import builtins
+import importlib.util
+from contextlib import contextmanager, nullcontext
+import sys
+import threading
+import time
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.start_time = None
+        self.imports = []    # (name, cumulative_s, self_s, depth)
+        self.sections = []   # (start, name, seconds, depth)
+        self._stack = []     # child time accumulated per open import
+        self._section_depth = 0
+        self._original_import = None
+        self._thread = None   # ident of the thread being profiled
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.start_time = time.perf_counter()
+        self._thread = threading.get_ident()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self.enabled:
+            builtins.__import__ = self._original_import
+            self.enabled = False
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != self._thread:
+            # _stack belongs to the main thread
+            return self._original_import(name, globals, locals, fromlist, level)
+        full_name = name
+        if level:
+            package = (globals or {}).get("__package__")
+            if not package or not name:
+                return self._original_import(name, globals, locals, fromlist, level)
+            full_name = importlib.util.resolve_name("." * level + name, package)
+        if full_name in sys.modules:
+            # already imported, nothing worth timing
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            self.imports.append((full_name, elapsed, elapsed - children, len(self._stack)))
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def section(self, name):
+        """Context manager timing a block, a no-op unless profiling"""
+        if not self.enabled:
+            return nullcontext()
+        return self._section(name)
+
+    @contextmanager
+    def _section(self, name):
+        depth = self._section_depth
+        self._section_depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._section_depth -= 1
+            self.sections.append((start, name, time.perf_counter() - start, depth))
+
+    def report(self, top=30, min_ms=1.0, file=None):
+        file = file or sys.stdout
+        total = time.perf_counter() - self.start_time if self.start_time else 0.0
+        print(f"\n=== Startup profile: {total * 1000:.0f} ms until first event loop pass ===", file=file)
+
+        print("\nImports (cumulative / self ms):", file=file)
+        for name, cumulative, own, depth in sorted(self.imports, key=lambda i: -i[1])[:top]:
+            if cumulative * 1000 < min_ms:
+                break
+            print(f"  {cumulative * 1000:8.1f} {own * 1000:8.1f}  {'  ' * depth}{name}", file=file)
+
+        print("\nSections (ms):", file=file)
+        # sections are recorded when they end, shown in the order they started
+        for _, name, seconds, depth in sorted(self.sections):
+            print(f"  {seconds * 1000:8.1f}  {'  ' * depth}{name}", file=file)
+        file.flush()
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,150 @@
+"""Tiled (SAHI-style) inference for small organisms in high resolution frames.
+
+The whole frame is downscaled to the model input, where a small animal in a 4K frame
+is only a few pixels. Here the frame is also cut into overlapping tiles inferred at
+the model's input size, the tile detections are shifted back to frame coordinates and
+merged per class with the whole frame ones"""
+import numpy as np
+from .detection_render import DetectionResult
+from .lazy_imports import yaml
+
+
+def tile_grid(width, height, tile_size, overlap):
+    """(x1, y1, x2, y2) tiles covering the frame, the last row/column aligned to its edge"""
+    step = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def merge_detections(boxes, scores, classes, threshold=0.5):
+    """Greedy per-class merge of overlapping boxes, highest score first.
+
+    Overlap is the intersection over the smaller box, so the part of an object cut by a
+    tile edge is matched with the whole object; the kept box grows to cover both"""
+    boxes = boxes.astype(np.float32)
+    areas = (boxes[:, 2] - boxes[:, 0]).clip(0) * (boxes[:, 3] - boxes[:, 1]).clip(0)
+    done = np.zeros(len(boxes), dtype=bool)
+    kept = []
+    for i in np.argsort(-scores, kind="stable"):
+        if done[i]:
+            continue
+        done[i] = True
+        candidates = np.flatnonzero(~done & (classes == classes[i]))
+        box = boxes[i].copy()
+        if candidates.size:
+            others = boxes[candidates]
+            inter = (np.minimum(box[2], others[:, 2]) - np.maximum(box[0], others[:, 0])).clip(0) * \
+                    (np.minimum(box[3], others[:, 3]) - np.maximum(box[1], others[:, 1])).clip(0)
+            overlap = inter / np.maximum(np.minimum(areas[i], areas[candidates]), 1e-6)
+            matched = candidates[overlap > threshold]
+            if matched.size:
+                done[matched] = True
+                box[:2] = np.minimum(box[:2], boxes[matched, :2].min(axis=0))
+                box[2:] = np.maximum(box[2:], boxes[matched, 2:].max(axis=0))
+        kept.append((box, scores[i], classes[i]))
+    if not kept:
+        return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32)
+    return (np.array([k[0] for k in kept], np.float32), np.array([k[1] for k in kept], np.float32),
+            np.array([k[2] for k in kept], np.int32))
+
+
+def load_tracker(tracker="botsort.yaml", frame_rate=30):
+    """The ultralytics tracker model.track() would use, fed with the merged detections"""
+    from ultralytics.trackers.track import TRACKER_MAP
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+    with open(check_yaml(tracker), encoding="utf-8") as f:
+        cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+    return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
+
+
+class TiledDetector:
+    """Whole frame pass plus a batch of overlapping tiles, merged and tracked.
+
+    With coarse_guided only the tiles touching a box of the whole frame pass (run at the
+    lower guide_conf) are inferred, so empty seafloor costs a single inference"""
+
+    def __init__(self, tile_size=640, overlap=0.2, coarse_guided=False, conf=0.5, guide_conf=0.1,
+                 merge_threshold=0.5, tile_batch=16, tracker="botsort.yaml"):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.coarse_guided = coarse_guided
+        self.conf = conf
+        self.guide_conf = guide_conf
+        self.merge_threshold = merge_threshold
+        self.tile_batch = tile_batch  # tiles per inference call, bounds the memory of 4K frames
+        self.tracker_config = tracker
+        self._tracker = None
+        self._tracked_model = None
+        # statistics
+        self.frames = 0
+        self.tiles_inferred = 0
+        self.tiles_possible = 0
+
+    def detect(self, model, frame, device):
+        """DetectionResult of a BGR frame in frame coordinates"""
+        h, w = frame.shape[:2]
+        coarse_conf = min(self.conf, self.guide_conf) if self.coarse_guided else self.conf
+        coarse = model.predict(frame, conf=coarse_conf, verbose=False, device=device)[0]
+        parts = [coarse.boxes.data.cpu().numpy()[:, [0, 1, 2, 3, -2, -1]]] if len(coarse.boxes) else []
+
+        tiles = tile_grid(w, h, self.tile_size, self.overlap) if max(h, w) > self.tile_size else []
+        self.tiles_possible += len(tiles)
+        if self.coarse_guided and tiles:
+            tiles = self._guided_tiles(tiles, parts[0][:, :4] if parts else np.empty((0, 4)))
+
+        for start in range(0, len(tiles), self.tile_batch):
+            chunk = tiles[start:start + self.tile_batch]
+            results = model.predict([frame[y1:y2, x1:x2] for x1, y1, x2, y2 in chunk], imgsz=self.tile_size,
+                                    conf=self.conf, verbose=False, device=device)
+            for (x1, y1, _, _), result in zip(chunk, results):
+                if len(result.boxes):
+                    data = result.boxes.data.cpu().numpy()[:, [0, 1, 2, 3, -2, -1]]
+                    data[:, [0, 2]] += x1
+                    data[:, [1, 3]] += y1
+                    parts.append(data)
+        self.tiles_inferred += len(tiles)
+        self.frames += 1
+
+        data = np.concatenate(parts) if parts else np.empty((0, 6), np.float32)
+        data = data[data[:, 4] >= self.conf]
+        boxes, scores, classes = merge_detections(data[:, :4], data[:, 4], data[:, 5].astype(np.int32),
+                                                  self.merge_threshold)
+        return self._track(model, frame, boxes, scores, classes)
+
+    def _guided_tiles(self, tiles, coarse_boxes):
+        if not len(coarse_boxes):
+            return []
+        grid = np.array(tiles, dtype=np.float32)
+        touches = (grid[:, None, 0] < coarse_boxes[None, :, 2]) & (grid[:, None, 2] > coarse_boxes[None, :, 0]) & \
+                  (grid[:, None, 1] < coarse_boxes[None, :, 3]) & (grid[:, None, 3] > coarse_boxes[None, :, 1])
+        return [tile for tile, hit in zip(tiles, touches.any(axis=1)) if hit]
+
+    def _track(self, model, frame, boxes, scores, classes):
+        shape = frame.shape[:2]
+        track_ids = np.full(len(boxes), -1, np.int64)
+        try:
+            if self._tracker is None or self._tracked_model is not model:
+                self._tracker = load_tracker(self.tracker_config)
+                self._tracked_model = model
+            from ultralytics.engine.results import Boxes
+            data = np.concatenate([boxes, scores[:, None], classes[:, None]], axis=1).astype(np.float32)
+            # x1, y1, x2, y2, track id, score, cls, index of the detection
+            tracks = np.asarray(self._tracker.update(Boxes(data, shape), frame))
+            if len(tracks):
+                boxes, scores, classes = tracks[:, :4], tracks[:, 5], tracks[:, 6].astype(np.int32)
+                track_ids = tracks[:, 4].astype(np.int64)
+            else:
+                boxes, scores, classes, track_ids = boxes[:0], scores[:0], classes[:0], track_ids[:0]
+        except Exception as e:
+            print("TiledDetector tracking error:", e)
+        return DetectionResult(boxes.astype(np.int32), classes.astype(np.int32), scores.astype(np.float32),
+                               track_ids, model.names, shape)
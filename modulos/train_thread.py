@@ -1,7 +1,7 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import os
 import traceback
-from ultralytics import YOLO
+from .lazy_imports import YOLO
 
 class TrainThread(QThread):
     """Training thread for YOLO detection models"""
@@ -245,8 +245,60 @@ TEXTS = {
         "train_segmentation_model": "Treinar Modelo de Segmentação",
         "sam2_segmentation_created": "Segmentação criada com {} pontos de polígono",
         "sam2_no_mask_to_add": "Nenhuma máscara SAM disponível para adicionar ao treino",
-        "sam2_added_to_training": "Segmentação SAM adicionada ao treino para classe: {}"
-
+        "sam2_added_to_training": "Segmentação SAM adicionada ao treino para classe: {}",
+        "playback_settings": "Configurações de reprodução",
+        "decode_queue_depth": "Frames pré-carregados",
+        "decode_policy": "Quando o buffer enche",
+        "decode_policy_block": "Aguardar (sem perder frames)",
+        "decode_policy_drop": "Descartar o frame mais antigo",
+        "decode_stats_format": "Buffer {}/{} | decodificação {:.1f} ms | descartados {} | atrasos {}",
+        "frame_cache_mb": "Cache de frames (MB)",
+        "detection_batch_size": "Lote de detecção (frames)",
+        "detection_batch_wait_ms": "Espera máxima do lote (ms)",
+        "model_state_format": "YOLO: {} | SAM 2: {}",
+        "model_state_none": "não carregado",
+        "model_state_loading": "carregando...",
+        "model_state_ready": "pronto",
+        "model_state_error": "erro",
+        "model_loading": "Carregando modelo {}...",
+        "sam2_refinement_hint": "clique esquerdo: objeto, clique direito ou Shift+clique: fundo",
+        "sam2_undo_point": "Desfazer ponto SAM 2",
+        "sam2_point_undone": "Último ponto SAM 2 removido",
+        "sam2_propagate": "Propagar máscara",
+        "sam2_cancel_propagation": "Cancelar propagação",
+        "sam2_frames_before": "Frames anteriores",
+        "sam2_frames_after": "Frames seguintes",
+        "sam2_propagation_started": "Propagando máscara SAM 2...",
+        "sam2_propagation_progress": "Propagação SAM 2: {}/{} frames",
+        "sam2_propagation_done": "Propagação concluída: {} máscaras adicionadas",
+        "detection_coverage": "Cobertura da detecção",
+        "detection_coverage_format": "{}/{} frames analisados ({:.0f}%)",
+        "detection_coverage_detail": "Frames reproduzidos: {played}\nEnviados à detecção: {submitted}\nAnalisados: {processed} ({percent:.1f}%)\nPulados: {skipped}\nSobrescritos/descartados: {overwritten}\nPasso atual: 1 a cada {stride} frames\nLatência por frame: {latency_ms} ms\nSem novidade (filtro de movimento): {gated}, ~{saved_s} s de inferência economizados",
+        "detection_schedule": "Agendamento da detecção contínua",
+        "detection_schedule_realtime": "Tempo real (cobertura máxima)",
+        "detection_schedule_every_frame": "Todos os frames (reprodução mais lenta)",
+        "motion_gate": "Filtro de movimento da detecção",
+        "motion_gate_off": "Desligado (analisa todos)",
+        "motion_gate_phash": "Hash perceptual (distância de Hamming)",
+        "motion_gate_flow": "Fluxo óptico (magnitude média)",
+        "motion_gate_background": "Subtração de fundo (fração de primeiro plano)",
+        "motion_gate_threshold": "Limiar do filtro",
+        "tiled_inference": "Inferência em blocos (objetos pequenos)",
+        "tiled_inference_enabled": "Usar na detecção contínua",
+        "tile_size": "Tamanho do bloco (px)",
+        "tile_overlap": "Sobreposição dos blocos",
+        "tile_coarse_guided": "Só blocos onde a passada no frame inteiro viu algo",
+        "tiled_coverage_format": "Blocos inferidos: {}/{} ({:.1f} por frame)",
+        "export_model": "Converter modelo para CPU (ONNX/OpenVINO)...",
+        "export_model_format": "Formato",
+        "export_model_int8": "Quantizar em INT8",
+        "export_model_calibration": "Selecione o dataset.yaml para calibração INT8",
+        "model_export_started": "Convertendo {}...",
+        "model_export_running": "Uma conversão de modelo já está em andamento",
+        "model_export_done": "Modelo convertido: {}",
+        "model_export_cached": "Conversão já existente: {}",
+        "model_export_error": "Falha ao converter modelo: {}",
+        "model_export_in_use": "detecção na CPU com {}"
     },
     "en": {
         "about_text": (
@@ -496,6 +548,59 @@ TEXTS = {
         "train_segmentation_model": "Train Segmentation Model",
         "sam2_segmentation_created": "Segmentation created with {} polygon points",
         "sam2_no_mask_to_add": "No SAM mask available to add to training",
-        "sam2_added_to_training": "SAM segmentation added to training set for class: {}"
+        "sam2_added_to_training": "SAM segmentation added to training set for class: {}",
+        "playback_settings": "Playback settings",
+        "decode_queue_depth": "Prefetched frames",
+        "decode_policy": "When the buffer is full",
+        "decode_policy_block": "Wait (never drop frames)",
+        "decode_policy_drop": "Drop the oldest frame",
+        "decode_stats_format": "Buffer {}/{} | decode {:.1f} ms | dropped {} | underruns {}",
+        "frame_cache_mb": "Frame cache (MB)",
+        "detection_batch_size": "Detection batch (frames)",
+        "detection_batch_wait_ms": "Max batch wait (ms)",
+        "model_state_format": "YOLO: {} | SAM 2: {}",
+        "model_state_none": "not loaded",
+        "model_state_loading": "loading...",
+        "model_state_ready": "ready",
+        "model_state_error": "error",
+        "model_loading": "Loading model {}...",
+        "sam2_refinement_hint": "left click: object, right click or Shift+click: background",
+        "sam2_undo_point": "Undo SAM 2 point",
+        "sam2_point_undone": "Last SAM 2 point removed",
+        "sam2_propagate": "Propagate mask",
+        "sam2_cancel_propagation": "Cancel propagation",
+        "sam2_frames_before": "Frames before",
+        "sam2_frames_after": "Frames after",
+        "sam2_propagation_started": "Propagating SAM 2 mask...",
+        "sam2_propagation_progress": "SAM 2 propagation: {}/{} frames",
+        "sam2_propagation_done": "Propagation finished: {} masks added",
+        "detection_coverage": "Detection coverage",
+        "detection_coverage_format": "{}/{} frames analysed ({:.0f}%)",
+        "detection_coverage_detail": "Frames played: {played}\nSent to detection: {submitted}\nAnalysed: {processed} ({percent:.1f}%)\nSkipped: {skipped}\nOverwritten/dropped: {overwritten}\nCurrent stride: 1 every {stride} frames\nLatency per frame: {latency_ms} ms\nNothing new (motion gate): {gated}, ~{saved_s} s of inference saved",
+        "detection_schedule": "Continuous detection scheduling",
+        "detection_schedule_realtime": "Real time (maximum coverage)",
+        "detection_schedule_every_frame": "Every frame (playback slows)",
+        "motion_gate": "Detection motion gate",
+        "motion_gate_off": "Off (analyse everything)",
+        "motion_gate_phash": "Perceptual hash (Hamming distance)",
+        "motion_gate_flow": "Optical flow (mean magnitude)",
+        "motion_gate_background": "Background subtraction (foreground fraction)",
+        "motion_gate_threshold": "Gate threshold",
+        "tiled_inference": "Tiled inference (small objects)",
+        "tiled_inference_enabled": "Use in continuous detection",
+        "tile_size": "Tile size (px)",
+        "tile_overlap": "Tile overlap",
+        "tile_coarse_guided": "Only tiles where the whole-frame pass saw something",
+        "tiled_coverage_format": "Tiles inferred: {}/{} ({:.1f} per frame)",
+        "export_model": "Convert model for CPU (ONNX/OpenVINO)...",
+        "export_model_format": "Format",
+        "export_model_int8": "INT8 quantization",
+        "export_model_calibration": "Select the dataset.yaml for INT8 calibration",
+        "model_export_started": "Converting {}...",
+        "model_export_running": "A model conversion is already running",
+        "model_export_done": "Model converted: {}",
+        "model_export_cached": "Conversion already available: {}",
+        "model_export_error": "Failed to convert model: {}",
+        "model_export_in_use": "CPU detection with {}"
     }
 }
\ No newline at end of file
@@ -1,18 +1,12 @@
 import json
-import yaml
 import os
 import sys
 import cv2
-import hashlib
-import pandas as pd
 import traceback
 from datetime import datetime, timedelta
 import csv
-import torch
 import numpy as np
 from collections import defaultdict
-from skimage import measure  
-from ultralytics import YOLO
 from pathlib import Path
 import shutil
 from PyQt6 import QtCore
@@ -23,7 +17,7 @@ from PyQt6.QtWidgets import (QApplication, QLabel, QPushButton, QVBoxLayout,
                             QHBoxLayout, QWidget, QFileDialog, QMainWindow, QToolBar, QStyle, QMessageBox, 
                             QInputDialog, QSlider, QDockWidget, QDialog, QDialogButtonBox, 
                             QSizePolicy, QFrame, QSpinBox, QFormLayout,
-                            QComboBox, QDoubleSpinBox, QProgressDialog)
+                            QComboBox, QDoubleSpinBox, QProgressDialog, QCheckBox)
 from .video_label import VideoLabel
 from .detections_dock import DetectionsDockWidget
 from .train_thread import TrainThread
@@ -31,8 +25,25 @@ from .train_thread import TrainSegmentationThread
 from .translations import TEXTS
 from .taxon_grid import TaxonGrid
 from .detection_thread import DetectionThread
+from .detection_scheduler import DetectionScheduler, REALTIME, EVERY_FRAME
+from .tiled_inference import TiledDetector
+from .motion_gate import MotionGate, METHODS as MOTION_GATE_METHODS, DEFAULT_THRESHOLDS as MOTION_GATE_THRESHOLDS, PHASH
 from .training_wizard import TrainingWizard
 from .sam2_thread import SAM2Thread
+from .sam2_propagation import SAM2PropagationThread
+from .overlay import OverlayCompositor
+from .model_loader import ModelLoaderThread
+from .model_export import ModelExportThread, exported_path, find_exported, ONNX, OPENVINO
+# torch, pandas and yaml are only imported when a feature needs them
+from .lazy_imports import torch, pd, yaml
+from .mask_utils import CompactMask, mask_to_yolo_polygon, DEFAULT_TOLERANCE, DEFAULT_MAX_VERTICES
+from .startup_profiler import profiler
+from .frame_reader import FrameReaderThread
+from .keyframe_index import KeyframeIndexThread
+from .frame_provider import FrameProvider
+from .frame_store import FrameStore, FrameRef
+from .detection_table import DetectionTable
+from .annotation_export import format_timestamp, best_by_track as group_best_by_track, write_csv
 
 def resource_path(relative_path):
     try:
@@ -54,14 +65,16 @@ class VideoAnnotator(QMainWindow):
         self.model = None
         self.custom_classes = []
         self.model_path = None
+        self.model_weights_path = None  # file the model was loaded from, exports are written next to it
+        self.last_dataset_yaml = None   # calibration data for INT8 exports
         self.cap = None
         self.video_path = None
         self.paused = True
         self.continuous_detection = False
-        self.annotations = []
+        self.annotations = DetectionTable()
         self.current_frame_num = 0
         self.total_frames = 0
-        self.all_detections = []
+        self.all_detections = DetectionTable()
         self.tracking_enabled = True
         self.track_colors = {}
         self.current_tracks = {}
@@ -74,15 +87,37 @@ class VideoAnnotator(QMainWindow):
         self.record_start_frame = 0
         self.recorded_detections = [] 
         self.best_confidence = {}  
-        self.init_ui()
-        self.create_menu()
-        self.apply_light_style()  
-        self.detection_every_n_frames = 2
-        self.detection_thread = DetectionThread(None)
-        self.detection_thread.detection_finished.connect(self.on_detection_finished)
-        self.detection_thread.start()
-        self.last_frame_hash = None
-        self.last_frame_small = None
+        self.frame_reader = None
+        self.keyframe_index = None
+        self.keyframe_index_thread = None
+        self.decode_queue_depth = 8
+        self.decode_drop_frames = False
+        self.frame_cache_mb = 512
+        # frames per inference batch (1 = latest frame only) and how long to wait for a full batch
+        self.detection_batch_size = 1
+        self.detection_max_wait_ms = 100
+        # tiled inference of continuous detection, for small organisms in high resolution frames
+        self.tiled_inference = False
+        self.tile_size = 640
+        self.tile_overlap = 0.2
+        self.tile_coarse_guided = True
+        self.frame_provider = FrameProvider(max_bytes=self.frame_cache_mb * 1024 * 1024)
+        self._displayed_frame = None  # (frame_num, ring buffer view) of the last played frame
+        self.frame_store = FrameStore()  # frames referenced by detections, one entry per distinct frame
+        with profiler.section("VideoAnnotator.init_ui"):
+            self.init_ui()
+        with profiler.section("VideoAnnotator.create_menu"):
+            self.create_menu()
+        with profiler.section("VideoAnnotator.apply_light_style"):
+            self.apply_light_style()  
+        self.detection_scheduler = DetectionScheduler()
+        # frames with nothing new are not detected again, evaluated by the decoder (GUI thread in live mode)
+        # while continuous detection is on
+        self.motion_gate = MotionGate(PHASH)
+        with profiler.section("DetectionThread"):
+            self.detection_thread = DetectionThread(None)
+            self.detection_thread.detection_finished.connect(self.on_detection_finished)
+            self.detection_thread.start()
         self.drawing_color = QColor(Qt.GlobalColor.green)
         self.dataset_mode = False              
         self.dataset_frames = []               
@@ -90,13 +125,20 @@ class VideoAnnotator(QMainWindow):
         self.training_wizard = None 
         self.sam2_refinement_mode = False  
         self.current_bb_for_refinement = None      
-        self.sam2_thread = None
+        self._sam2_session_annotation = None  # (session id, segmentation annotation) being refined
+        self._sam2_last_prompts = None  # (frame_num, box, points) of the last refined mask
+        self.sam2_propagation = None  # SAM2PropagationThread while one runs
+        self.sam2_propagation_frames = (0, 100)  # frames before / after the refined one
+        self.polygon_tolerance = DEFAULT_TOLERANCE  # pixels, mask contour simplification
+        self.polygon_max_vertices = DEFAULT_MAX_VERTICES
+        self.overlay_compositor = OverlayCompositor(alpha=0.4)
+        self.sam2_thread = None  # created on first use, see ensure_sam2()
         self.sam2_masks = {}  
         self.current_sam2_mask = None
-        self.init_sam2()     
         
         self.taxon_grid = None
-        self.taxon_grid = TaxonGrid(self)
+        with profiler.section("TaxonGrid"):
+            self.taxon_grid = TaxonGrid(self)
         self.taxon_grid_dock = QDockWidget(self.texts["taxons"])
         self.taxon_grid.title_changed.connect(self.taxon_grid_dock.setWindowTitle)
         self.taxon_grid_dock.setWidget(self.taxon_grid)
@@ -107,7 +149,7 @@ class VideoAnnotator(QMainWindow):
         initial += self.custom_classes
         self.taxon_grid.populate(initial)
         self.taxon_grid.taxon_changed.connect(self.change_drawing_class)
-        self.load_model()
+        self.load_model()  # loads in the background, not part of the startup profile
 
     def init_ui(self):
         self.central_widget = QWidget()
@@ -207,7 +249,8 @@ class VideoAnnotator(QMainWindow):
         self.velocity2_button.clicked.connect(self.velocity2)
 
         #Detections Dock
-        self.detections_dock = DetectionsDockWidget(self)
+        with profiler.section("DetectionsDockWidget"):
+            self.detections_dock = DetectionsDockWidget(self)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.detections_dock)
 
         #Side layout (buttons)
@@ -233,7 +276,7 @@ class VideoAnnotator(QMainWindow):
 
         #progress slider
         self.progress_slider = QSlider(Qt.Orientation.Horizontal)
-        self.progress_slider.setRange(0, 100)
+        self.progress_slider.setRange(0, 0)
         self.progress_slider.sliderMoved.connect(self.seek_video)
         self.progress_slider.sliderPressed.connect(self.pause_video_for_seeking)
         self.progress_slider.sliderReleased.connect(self.resume_video_after_seeking)
@@ -263,6 +306,27 @@ class VideoAnnotator(QMainWindow):
         self.timer.timeout.connect(self.update_frame)
         self.setAcceptDrops(True)
 
+        # decoder statistics shown on the status bar
+        self.decode_stats_label = QLabel("")
+        self.decode_stats_label.setStyleSheet("color: gray")
+        self.statusBar().addPermanentWidget(self.decode_stats_label)
+        self.decode_stats_timer = QTimer(self)
+        self.decode_stats_timer.timeout.connect(self.update_decode_stats)
+
+        # models load in the background, their state is shown on the status bar
+        self.model_loader = None
+        self.model_exporter = None
+        self.yolo_state = "none"
+        self.sam_state = "none"
+        self.model_status_label = QLabel("")
+        self.model_status_label.setStyleSheet("color: gray")
+        self.statusBar().addPermanentWidget(self.model_status_label)
+        self.update_model_status()
+
+    def update_model_status(self):
+        self.model_status_label.setText(self.texts["model_state_format"].format(
+            self.texts[f"model_state_{self.yolo_state}"], self.texts[f"model_state_{self.sam_state}"]))
+
     def recolor_icon(self, standard_icon, color=QColor("white")):
         """Recolor icons from QStyle for the dark mode"""
         pixmap = self.style().standardIcon(standard_icon).pixmap(24, 24) #convert the native icon from the system to pixmap.
@@ -471,6 +535,10 @@ class VideoAnnotator(QMainWindow):
         unload_model_action.triggered.connect(self.unload_model)
         file_menu.addAction(unload_model_action)
 
+        export_model_action = QAction(self.texts["export_model"], self)
+        export_model_action.triggered.connect(self.export_model_dialog)
+        file_menu.addAction(export_model_action)
+
         load_annotations_action = QAction(self.texts["load_annotations"], self)
         load_annotations_action.setShortcut(QKeySequence("Ctrl+L"))
         load_annotations_action.triggered.connect(self.load_annotations_dialog)
@@ -509,11 +577,18 @@ class VideoAnnotator(QMainWindow):
         toggle_history_action.setShortcut(QKeySequence("Ctrl+H"))
         toggle_history_action.triggered.connect(self.toggle_detections_history)
         view_menu.addAction(toggle_history_action)
+        coverage_action = QAction(self.texts["detection_coverage"], self)
+        coverage_action.triggered.connect(self.show_detection_coverage)
+        view_menu.addAction(coverage_action)
         view_menu.addSeparator()
         dark_mode_action = QAction(self.texts["dark_mode"], self)
         dark_mode_action.setCheckable(True)
         dark_mode_action.triggered.connect(self.set_dark_mode)
         view_menu.addAction(dark_mode_action)
+        view_menu.addSeparator()
+        playback_settings_action = QAction(self.texts["playback_settings"], self)
+        playback_settings_action.triggered.connect(self.show_playback_settings)
+        view_menu.addAction(playback_settings_action)
             
         # annotation menu
         annotation_menu = menubar.addMenu(self.texts["annotation"])
@@ -533,6 +608,15 @@ class VideoAnnotator(QMainWindow):
         manual_action.triggered.connect(self.enable_manual_annotation)
         annotation_menu.addAction(manual_action)
 
+        tiled_action = QAction(self.texts["tiled_inference"], self)
+        tiled_action.triggered.connect(self.show_tiled_inference_settings)
+        annotation_menu.addAction(tiled_action)
+
+        undo_sam2_action = QAction(self.texts["sam2_undo_point"], self)
+        undo_sam2_action.setShortcut(QKeySequence("Ctrl+Z"))
+        undo_sam2_action.triggered.connect(self.undo_sam2_point)
+        annotation_menu.addAction(undo_sam2_action)
+
         # training menu
         training_menu = menubar.addMenu(self.texts["train"])
         ("Treino")
@@ -628,6 +712,8 @@ class VideoAnnotator(QMainWindow):
         if hasattr(self, 'training_wizard') and self.training_wizard is not None:
             self.training_wizard.update_language(lang)
 
+        self.update_model_status()
+
         self.menuBar().clear()
         self.create_menu()
         self.detections_dock.show()
@@ -805,6 +891,8 @@ class VideoAnnotator(QMainWindow):
         return cameras if cameras else [self.texts["camera_name"].format(0)]
 
     def start_camera(self):
+        self.stop_frame_reader()
+        self.detection_thread.clear_pending()
         if self.cap is not None:
             self.cap.release()
         
@@ -830,10 +918,10 @@ class VideoAnnotator(QMainWindow):
             self.current_time_label.setText("00:00:00")
             self.total_time_label.setText(self.texts["live_text"])
             
-            self.annotations = []
+            self.annotations.clear()
             self.video_label.manual_annotations = []
             if hasattr(self, 'detections_dock'):
-                self.detections_dock.all_detections = []
+                self.detections_dock.all_detections.clear()
                 self.detections_dock.apply_filters()
             
             self.timer.start(30)
@@ -866,42 +954,141 @@ class VideoAnnotator(QMainWindow):
             self.load_model(path)
 
     def load_model(self, model_path=None):
-        try:
-            if model_path is None:
-                # loads deafault model
-                self.model = YOLO(resource_path("yolov8n.pt"))
-                self.model_path = "yolov8n.pt"
-            else:
-                if os.path.exists(model_path):
-                    self.model = YOLO(resource_path(model_path))
-                    self.model_path = os.path.basename(model_path)
-                    if self.detection_thread:
-                        self.detection_thread.set_model(self.model)
-                else:
-                    raise FileNotFoundError(self.texts["model_not_found"].format(model_path))
-            
-            self.status_label.setText(self.texts["model_loaded"].format(self.model_path))
-            
-            # updates the classes filter on the dock 
-            if hasattr(self, 'detections_dock'):
-                self.detections_dock.update_class_filter()
+        """Starts loading a YOLO model in the background, on_model_ready installs it"""
+        if model_path is None:
+            # loads deafault model
+            weights_path, name = resource_path("yolov8n.pt"), "yolov8n.pt"
+        elif os.path.exists(model_path):
+            weights_path, name = resource_path(model_path), os.path.basename(model_path)
+        else:
+            self.on_model_error(self.texts["model_not_found"].format(model_path))
+            return
 
-            self.refresh_taxon_grid()
+        # a newer request supersedes one still loading, its result is ignored
+        self.model_loader = ModelLoaderThread(weights_path, name, self)
+        self.model_loader.model_ready.connect(self.on_model_ready)
+        self.model_loader.error.connect(self.on_model_error)
+        self.model_loader.finished.connect(self.model_loader.deleteLater)
+        self.model_loader.start()
 
-        except Exception as e:
-            error_msg = self.texts["model_load_error"].format(str(e))
-            self.status_label.setText(error_msg)
-            QMessageBox.critical(self, self.texts["error"], error_msg)
-            self.model = None
-            self.model_path = None
+        self.yolo_state = "loading"
+        self.update_model_status()
+        self.set_status_message("model_loading", name)
+
+    def on_model_ready(self, model, cpu_model, model_path):
+        if self.sender() is not self.model_loader:
+            return
+        self.model_weights_path = self.model_loader.weights_path
+        self.model_loader = None
+        self.model = model
+        self.model_path = model_path
+        if self.detection_thread:
+            # continuous detection runs the exported model when there is no GPU
+            self.detection_thread.set_model(self.model, cpu_model)
+        self.yolo_state = "ready"
+        self.update_model_status()
+
+        message = self.texts["model_loaded"].format(self.model_path)
+        if cpu_model is not None:
+            message += " - " + self.texts["model_export_in_use"].format(os.path.basename(find_exported(self.model_weights_path)))
+        self.status_label.setText(message)
+
+        # updates the classes filter on the dock 
+        if hasattr(self, 'detections_dock'):
+            self.detections_dock.update_class_filter()
+
+        self.refresh_taxon_grid()
+
+    def on_model_error(self, message):
+        if self.sender() is not None and self.sender() is not self.model_loader:
+            return
+        self.model_loader = None
+        error_msg = self.texts["model_load_error"].format(message)
+        self.status_label.setText(error_msg)
+        QMessageBox.critical(self, self.texts["error"], error_msg)
+        self.model = None
+        self.model_path = None
+        self.model_weights_path = None
+        self.yolo_state = "error"
+        self.update_model_status()
 
     def unload_model(self):
+        self.model_loader = None  # a load in progress is discarded when it ends
         self.model = None
         self.model_path = None
+        self.model_weights_path = None
         if self.detection_thread:
             self.detection_thread.set_model(None)
+        self.yolo_state = "none"
+        self.update_model_status()
         self.status_label.setText(self.texts["model_unloaded"])
 
+    def export_model_dialog(self):
+        """Converts the loaded .pt to ONNX or OpenVINO (optionally INT8) for CPU inference"""
+        if self.model is None or not (self.model_weights_path or "").endswith(".pt"):
+            self.set_status_message("no_model_loaded")
+            return
+        if self.model_exporter is not None:
+            self.set_status_message("model_export_running")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(self.texts["export_model"])
+        form_layout = QFormLayout(dialog)
+
+        format_combo = QComboBox()
+        format_combo.addItems(["OpenVINO", "ONNX"])
+        form_layout.addRow(self.texts["export_model_format"], format_combo)
+
+        int8_check = QCheckBox()
+        form_layout.addRow(self.texts["export_model_int8"], int8_check)
+        # ultralytics quantizes OpenVINO exports only
+        format_combo.currentIndexChanged.connect(lambda index: int8_check.setEnabled(index == 0))
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(dialog.accept)
+        button_box.rejected.connect(dialog.reject)
+        form_layout.addWidget(button_box)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        fmt = OPENVINO if format_combo.currentIndex() == 0 else ONNX
+        int8 = fmt == OPENVINO and int8_check.isChecked()
+        cached = exported_path(self.model_weights_path, fmt, int8)
+        if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(self.model_weights_path):
+            self.set_status_message("model_export_cached", cached)
+            self.load_model(self.model_weights_path)
+            return
+        data = None
+        if int8:
+            # calibrated on the project's own frames, from a dataset exported for training
+            data, _ = QFileDialog.getOpenFileName(self, self.texts["export_model_calibration"],
+                                                  self.last_dataset_yaml or "", "dataset.yaml (*.yaml)")
+            if not data:
+                return
+
+        self.model_exporter = ModelExportThread(self.model_weights_path, fmt, int8, data, self)
+        self.model_exporter.export_finished.connect(self.on_model_exported)
+        self.model_exporter.error.connect(self.on_model_export_error)
+        self.model_exporter.finished.connect(self.model_exporter.deleteLater)
+        self.model_exporter.start()
+        self.set_status_message("model_export_started", os.path.basename(self.model_weights_path))
+
+    def on_model_exported(self, path):
+        weights_path = self.sender().weights_path
+        self.model_exporter = None
+        self.set_status_message("model_export_done", path)
+        if weights_path == self.model_weights_path:
+            # reloads so the detection thread picks the export up when running on CPU
+            self.load_model(weights_path)
+
+    def on_model_export_error(self, message):
+        self.model_exporter = None
+        error_msg = self.texts["model_export_error"].format(message)
+        self.status_label.setText(error_msg)
+        QMessageBox.critical(self, self.texts["error"], error_msg)
+
     def load_video(self):
         file_path, _ = QFileDialog.getOpenFileName(self, self.texts["select_video"], "", 
                                                    "Vídeos (*.mp4 *.avi *.mov *.mkv *.m4v *.flv *.wmv);;Todos os arquivos (*)")
@@ -913,6 +1100,10 @@ class VideoAnnotator(QMainWindow):
         self.video_path = file_path
         self.video_name_label.setText(self.texts["video_name_format"].format(os.path.basename(file_path)))
         
+        self.stop_frame_reader()
+        self.stop_keyframe_index()
+        self.detection_thread.clear_pending()
+        self.frame_provider.release(file_path)  # the file may have changed since it was cached
         if self.cap is not None:
             self.cap.release()
         
@@ -926,6 +1117,7 @@ class VideoAnnotator(QMainWindow):
         self.video_label._aspect_ratio = width / height
             
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.progress_slider.setRange(0, max(self.total_frames - 1, 0))
         self.current_frame_num = 0
         self.paused = True
         is_dark = self.palette().color(QPalette.ColorRole.Window).lightness() < 128   
@@ -951,13 +1143,216 @@ class VideoAnnotator(QMainWindow):
         
         ret, frame = self.cap.read()
         if ret:
-            self.current_frame_num = 1
+            self.current_frame_num = 0
             self.display_frame(frame)
+            self.frame_provider.put(file_path, 0, frame)
             self.update_time_labels()
             self.status_label.setText(self.texts["video_loaded"])
         else:
             self.status_label.setText(self.texts["video_first_frame_error"])
 
+        self.start_frame_reader(file_path)
+        self.start_keyframe_index(file_path)
+
+    def start_keyframe_index(self, file_path):
+        """Loads the cached keyframe index or scans the video in the background"""
+        self.keyframe_index_thread = KeyframeIndexThread(file_path, self)
+        self.keyframe_index_thread.index_ready.connect(self.on_keyframe_index_ready)
+        self.keyframe_index_thread.start()
+
+    def stop_keyframe_index(self):
+        if self.keyframe_index_thread is not None:
+            self.keyframe_index_thread.stop()
+            self.keyframe_index_thread = None
+        self.keyframe_index = None
+
+    def on_keyframe_index_ready(self, index):
+        if index.video_path != self.video_path:
+            return
+        self.keyframe_index = index
+        self.frame_provider.set_keyframe_index(index.video_path, index)
+        if self.frame_reader is not None:
+            self.frame_reader.set_keyframe_index(index)
+
+    def start_frame_reader(self, file_path):
+        """Starts the background decoder for video playback"""
+        self.stop_frame_reader()
+        self.frame_reader = FrameReaderThread(
+            file_path,
+            queue_depth=self.decode_queue_depth,
+            drop_frames=self.decode_drop_frames,
+            motion_gate=self.motion_gate if self.continuous_detection else None,
+            parent=self
+        )
+        self.frame_reader.set_keyframe_index(self.keyframe_index)
+        self.frame_reader.error.connect(lambda msg: self.status_label.setText(self.texts["error"] + ": " + msg))
+        self.frame_reader.seek(self.current_frame_num + 1)
+        self.frame_reader.start()
+        self.decode_stats_timer.start(1000)
+
+    def stop_frame_reader(self):
+        if self.frame_reader is not None:
+            self.frame_reader.stop()
+            self.frame_reader = None
+        self._displayed_frame = None
+        self.decode_stats_timer.stop()
+        self.decode_stats_label.setText("")
+
+    def sync_frame_reader(self):
+        """Makes playback continue right after the frame on screen"""
+        if self.frame_reader is not None and not self.live_mode:
+            self.frame_reader.seek(self.current_frame_num + 1)
+
+    def update_decode_stats(self):
+        if self.frame_reader is None:
+            return
+        stats = self.frame_reader.stats()
+        self.decode_stats_label.setText(self.texts["decode_stats_format"].format(
+            stats["queued"], stats["depth"], stats["decode_ms"],
+            stats["dropped"], stats["underruns"]
+        ))
+
+    def show_playback_settings(self):
+        """Dialog for the decoder queue depth and the drop/block policy"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle(self.texts["playback_settings"])
+        form_layout = QFormLayout(dialog)
+
+        depth_spin = QSpinBox()
+        depth_spin.setRange(2, 64)
+        depth_spin.setValue(self.decode_queue_depth)
+        form_layout.addRow(self.texts["decode_queue_depth"], depth_spin)
+
+        cache_spin = QSpinBox()
+        cache_spin.setRange(64, 16384)
+        cache_spin.setSingleStep(64)
+        cache_spin.setValue(self.frame_cache_mb)
+        form_layout.addRow(self.texts["frame_cache_mb"], cache_spin)
+
+        policy_combo = QComboBox()
+        policy_combo.addItems([self.texts["decode_policy_block"], self.texts["decode_policy_drop"]])
+        policy_combo.setCurrentIndex(1 if self.decode_drop_frames else 0)
+        form_layout.addRow(self.texts["decode_policy"], policy_combo)
+
+        batch_spin = QSpinBox()
+        batch_spin.setRange(1, 64)
+        batch_spin.setValue(self.detection_batch_size)
+        form_layout.addRow(self.texts["detection_batch_size"], batch_spin)
+
+        batch_wait_spin = QSpinBox()
+        batch_wait_spin.setRange(0, 5000)
+        batch_wait_spin.setSingleStep(10)
+        batch_wait_spin.setValue(self.detection_max_wait_ms)
+        form_layout.addRow(self.texts["detection_batch_wait_ms"], batch_wait_spin)
+
+        schedule_combo = QComboBox()
+        schedule_combo.addItems([self.texts["detection_schedule_realtime"], self.texts["detection_schedule_every_frame"]])
+        schedule_combo.setCurrentIndex(1 if self.detection_scheduler.mode == EVERY_FRAME else 0)
+        form_layout.addRow(self.texts["detection_schedule"], schedule_combo)
+
+        gate_combo = QComboBox()
+        gate_combo.addItems([self.texts[f"motion_gate_{method}"] for method in MOTION_GATE_METHODS])
+        gate_combo.setCurrentIndex(MOTION_GATE_METHODS.index(self.motion_gate.method))
+        form_layout.addRow(self.texts["motion_gate"], gate_combo)
+
+        gate_threshold_spin = QDoubleSpinBox()
+        gate_threshold_spin.setDecimals(3)
+        gate_threshold_spin.setRange(0.0, 64.0)
+        gate_threshold_spin.setSingleStep(0.001)
+        gate_threshold_spin.setValue(self.motion_gate.threshold)
+        gate_threshold_spin.setEnabled(self.motion_gate.method in MOTION_GATE_THRESHOLDS)
+        form_layout.addRow(self.texts["motion_gate_threshold"], gate_threshold_spin)
+
+        def gate_method_changed(index):
+            # each method measures something different, start from its own default
+            method = MOTION_GATE_METHODS[index]
+            gate_threshold_spin.setEnabled(method in MOTION_GATE_THRESHOLDS)
+            gate_threshold_spin.setValue(MOTION_GATE_THRESHOLDS.get(method, 0.0))
+        gate_combo.currentIndexChanged.connect(gate_method_changed)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(dialog.accept)
+        button_box.rejected.connect(dialog.reject)
+        form_layout.addWidget(button_box)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        depth_changed = depth_spin.value() != self.decode_queue_depth
+        self.decode_queue_depth = depth_spin.value()
+        self.decode_drop_frames = policy_combo.currentIndex() == 1
+        self.frame_cache_mb = cache_spin.value()
+        self.frame_provider.set_max_bytes(self.frame_cache_mb * 1024 * 1024)
+        self.detection_batch_size = batch_spin.value()
+        self.detection_max_wait_ms = batch_wait_spin.value()
+        self.detection_thread.set_batching(self.detection_batch_size, self.detection_max_wait_ms)
+        self.detection_scheduler.mode = EVERY_FRAME if schedule_combo.currentIndex() == 1 else REALTIME
+
+        gate_method = MOTION_GATE_METHODS[gate_combo.currentIndex()]
+        if gate_method != self.motion_gate.method or gate_threshold_spin.value() != self.motion_gate.threshold:
+            # a new gate instead of changing the one the decoder thread may be using
+            self.motion_gate = MotionGate(gate_method, gate_threshold_spin.value())
+            if self.frame_reader is not None and self.continuous_detection:
+                self.frame_reader.set_motion_gate(self.motion_gate)
+
+        if self.frame_reader is not None:
+            if depth_changed:
+                # the ring is preallocated, so a new depth needs a new decoder
+                self.start_frame_reader(self.frame_reader.video_path)
+            else:
+                self.frame_reader.set_drop_frames(self.decode_drop_frames)
+
+    def show_tiled_inference_settings(self):
+        """Dialog for tiled inference of continuous detection"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle(self.texts["tiled_inference"])
+        form_layout = QFormLayout(dialog)
+
+        enabled_check = QCheckBox()
+        enabled_check.setChecked(self.tiled_inference)
+        form_layout.addRow(self.texts["tiled_inference_enabled"], enabled_check)
+
+        size_spin = QSpinBox()
+        size_spin.setRange(256, 2048)
+        size_spin.setSingleStep(32)  # the model stride
+        size_spin.setValue(self.tile_size)
+        form_layout.addRow(self.texts["tile_size"], size_spin)
+
+        overlap_spin = QDoubleSpinBox()
+        overlap_spin.setRange(0.0, 0.5)
+        overlap_spin.setSingleStep(0.05)
+        overlap_spin.setValue(self.tile_overlap)
+        form_layout.addRow(self.texts["tile_overlap"], overlap_spin)
+
+        guided_check = QCheckBox()
+        guided_check.setChecked(self.tile_coarse_guided)
+        form_layout.addRow(self.texts["tile_coarse_guided"], guided_check)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(dialog.accept)
+        button_box.rejected.connect(dialog.reject)
+        form_layout.addWidget(button_box)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        self.tiled_inference = enabled_check.isChecked()
+        self.tile_size = size_spin.value() // 32 * 32
+        self.tile_overlap = overlap_spin.value()
+        self.tile_coarse_guided = guided_check.isChecked()
+        tiler = TiledDetector(self.tile_size, self.tile_overlap, self.tile_coarse_guided) if self.tiled_inference else None
+        self.detection_thread.set_tiler(tiler)
+
+    def show_detection_coverage(self):
+        """How much of the played video continuous detection actually analysed"""
+        stats = self.detection_scheduler.stats(self.detection_thread)
+        text = self.texts["detection_coverage_detail"].format(**stats, percent=stats["coverage"] * 100)
+        tiler = self.detection_thread.tiler
+        if tiler is not None and tiler.frames:
+            text += "\n" + self.texts["tiled_coverage_format"].format(
+                tiler.tiles_inferred, tiler.tiles_possible, tiler.tiles_inferred / tiler.frames)
+        QMessageBox.information(self, self.texts["detection_coverage"], text)
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
@@ -969,21 +1364,33 @@ class VideoAnnotator(QMainWindow):
                 self.start_video(file_path)
                 break
     
-    def capture_current_frame(self):
-        if self.cap is None or not self.cap.isOpened():
+    def read_frame_at(self, frame_num):
+        """Returns a frame of the current video by number through the shared frame cache.
+        The array is read-only, copy it before drawing on it"""
+        if self.live_mode:
+            if self.cap is None or not self.cap.isOpened():
+                return None
+            ret, frame = self.cap.read()
+            return frame if ret else None
+
+        if not self.video_path:
             return None
-        
-        # saves the current frame position 
-        current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-            
-        # reads the current frame 
-        ret, frame = self.cap.read()
-        if not ret:
+
+        # the frame on screen is still in the decoder ring, keep it instead of decoding it again
+        if self._displayed_frame is not None and self._displayed_frame[0] == frame_num:
+            self.frame_provider.put(self.video_path, frame_num, self._displayed_frame[1].copy())
+            self._displayed_frame = None
+        return self.frame_provider.get_frame(self.video_path, frame_num)
+
+    def read_current_frame(self):
+        """Returns the BGR frame currently on screen"""
+        return self.read_frame_at(self.current_frame_num)
+
+    def capture_current_frame(self):
+        frame = self.read_current_frame()
+        if frame is None:
             return None
             
-        # restores the original position 
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
-            
         # converts to QImage 
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         h, w, ch = frame_rgb.shape
@@ -992,35 +1399,38 @@ class VideoAnnotator(QMainWindow):
             
         return q_img.copy()
     
-    def frame_to_small_and_hash(self, frame: np.ndarray) -> tuple[str, np.ndarray]:
-        # reduced/hashed version of the frames that goes to "similar_frames"
-        small = cv2.resize(frame, (64, 64))
-        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
-        h = hashlib.blake2b(gray.tobytes(), digest_size=8).hexdigest()
-        return h, small
-    
-    def similar_frames(self, frame1: np.ndarray, frame2: np.ndarray, threshold=2):
-        # Compares two frames, if is too similar the model will skip
-        if frame1 is None or frame2 is None:
-            return False
-        diff = cv2.absdiff(frame1, frame2)
-        mean_diff = np.mean(diff)
-        return mean_diff < threshold
-    
     def update_frame(self):
         if self.paused or self.cap is None or not self.cap.isOpened():
             return
+        if self.continuous_detection and self.detection_scheduler.holds_playback() and \
+                not self.detection_thread.can_accept():
+            return  # every-frame detection: the video waits for the detector
         
         try:
-            ret, frame = self.cap.read()
+            novel = True
+            if self.live_mode or self.frame_reader is None:
+                ret, frame = self.cap.read()
+                if ret and self.continuous_detection:
+                    novel = self.motion_gate.update(frame)[0]  # before the timestamp is drawn on it
+            else:
+                # takes the next prefetched frame, decoding happens on the reader thread
+                item = self.frame_reader.take_frame()
+                ret = item is not None
+                if not ret and not self.frame_reader.at_end():
+                    return  # decoder is behind, try again on the next tick
+                if ret:
+                    frame_num, frame, novel = item
+                    self._displayed_frame = item
+
             if not ret:
                 if self.live_mode:
                     # tries to reconnect camera
                     self.start_camera()
                     return
                 else:
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
                     self.current_frame_num = 0
+                    if self.frame_reader is not None:
+                        self.frame_reader.seek(0)
                     self.paused = True
                     self._play_action.setIcon(self.play_icon)
                     self._play_action.setText(self.texts["play"])
@@ -1028,18 +1438,19 @@ class VideoAnnotator(QMainWindow):
                     
             # Updates the current frame number (only for video file)
             if not self.live_mode:
-                self.current_frame_num = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+                self.current_frame_num = frame_num if self.frame_reader is not None else \
+                    int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
                 self.update_progress_slider()
 
             # if recording, saves the frame 
             if self.recording and self.video_writer is not None:
                 self.video_writer.write(frame)
 
-            # Frame skipping logic for continuous detection
-            should_detect = True
-            if self.continuous_detection and self.velocity:
-                self.frame_skip_counter += 1
-                should_detect = (self.frame_skip_counter % self.detection_every_n_frames == 0)
+            # Frame skipping logic for continuous detection, stride adapted to the inference latency
+            should_detect = False
+            if self.continuous_detection:
+                self.detection_scheduler.frame_played(self.detection_thread.latency)
+                should_detect = self.detection_scheduler.should_detect(self.detection_thread.can_accept(), novel)
                 
             # Adds timestamp to frame (live mode only)
             if self.live_mode:
@@ -1080,35 +1491,11 @@ class VideoAnnotator(QMainWindow):
                 if frame_copy is None or frame_copy.size == 0:
                     return
 
-                frame_hash, frame_small = self.frame_to_small_and_hash(frame_copy)
-                if self.last_frame_hash is None or not self.similar_frames(self.last_frame_small, frame_small, threshold=2):
-                    self.last_frame_hash = frame_hash
-                    self.last_frame_small = frame_small
-                    frame_num = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-                    self.detection_thread.set_frame(frame_copy, frame_num)
-                
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-            #Resizing while maintaining aspect ratio
-            h, w = frame.shape[:2]
-            target_w = self.video_label.width()
-            target_h = self.video_label.height()
-            
-            if w/h > target_w/target_h:
-                new_w = target_w
-                new_h = int(h * target_w / w)
-            else:
-                new_h = target_h
-                new_w = int(w * target_h / h)
+                self.detection_thread.set_frame(frame_copy, self.current_frame_num)
+                self.detection_scheduler.mark_submitted()
                 
-            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
-            
-            #frame display
-            h, w = frame.shape[:2]
-            bytes_per_line = 3 * w
-            q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-            self.video_label.setPixmap(pixmap)
+            # one resize + colour conversion into the label's reused buffers
+            self.video_label.show_frame(frame)
             self.update_time_labels()
                 
         except Exception as e:
@@ -1133,21 +1520,18 @@ class VideoAnnotator(QMainWindow):
         self._play_action.setText(self.texts["play"])
         self.timer.stop()
         
-        current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-        ret, frame = self.cap.read()
-        if not ret:
+        frame = self.read_current_frame()
+        if frame is None:
             self.set_status_message("error_reading_frame")
             return
         
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
-        
         if self.model is None:
             self.set_status_message("no_model_loaded")
             return
         
         try:
             self.detect_objects_in_frame(frame)
-            self.set_status_message("detection_completed", int(current_pos))
+            self.set_status_message("detection_completed", self.current_frame_num)
         except Exception as e:
             self.set_status_message("detection_error", str(e))
 
@@ -1157,9 +1541,9 @@ class VideoAnnotator(QMainWindow):
             return False
         
         try:
-            self.annotations = []
+            self.annotations.clear()
             
-            frame_copy = np.ascontiguousarray(frame)
+            frame_copy = np.ascontiguousarray(frame.copy())
             
             with torch.no_grad():
                 results = self.model.track(
@@ -1173,14 +1557,14 @@ class VideoAnnotator(QMainWindow):
             if len(results) > 0:
                 plotted_frame = results[0].plot()  
                 boxes = results[0].boxes
+                # one stored frame shared by every box of this frame
+                detection_frame = self.frame_store.add(frame_copy) if len(boxes) else None
                 for box in boxes:
                     x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
                     cls_id = int(box.cls[0])
                     conf = float(box.conf[0])
                     label = self.model.names[cls_id]
                     track_id = int(box.id) if box.id is not None else None
-                        
-                    detection_frame = self.capture_current_frame()
                     
                     detection = {
                         "x1": x1, "y1": y1, "x2": x2, "y2": y2,
@@ -1211,30 +1595,26 @@ class VideoAnnotator(QMainWindow):
             return False
     
     def on_detection_finished(self, results, used_frame, frame_num):
-        if results is None or not results.boxes:
+        """results is a DetectionResult already drawn by the detection thread"""
+        if results is None or not len(results):
             return
 
-        plotted = results.plot()          
-        self.display_frame(plotted)
-
-        rgb = cv2.cvtColor(used_frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb.shape
-
-        for box in results.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-            cls_id   = int(box.cls[0])
-            conf     = float(box.conf[0])
-            label    = self.model.names[cls_id]
-            track_id = int(box.id) if box.id is not None else None
+        self.display_frame(results.overlay)
 
+        h, w = results.shape
+        timestamp = self.get_video_timestamp(frame_num)
+        for (x1, y1, x2, y2), cls_id, conf, track_id in zip(results.boxes.tolist(), results.classes.tolist(),
+                                                             results.confidences.tolist(),
+                                                             results.track_ids.tolist()):
+            label = results.names[cls_id]
             detection = {
                 "x1": x1, "y1": y1, "x2": x2, "y2": y2,
                 "label": label,
                 "confidence": conf,
                 "type": "auto",
                 "class": label,
-                "timestamp": self.get_video_timestamp(frame_num),
-                "track_id": track_id,
+                "timestamp": timestamp,
+                "track_id": track_id if track_id >= 0 else None,
                 "frame_number": frame_num,
                 "video_path": self.video_path,               
                 "frame_dimensions": f"{w}x{h}", 
@@ -1254,6 +1634,10 @@ class VideoAnnotator(QMainWindow):
             self.continuous_detection = not self.continuous_detection
             
             if self.continuous_detection:
+                if not self.model and self.model_loader is not None:
+                    self.set_status_message("model_loading", self.model_loader.model_path)
+                    self.continuous_detection = False
+                    return
                 if not self.model:
                     self.set_status_message("no_model_loaded_error")
                     self.continuous_detection = False
@@ -1271,6 +1655,12 @@ class VideoAnnotator(QMainWindow):
                     }
                 """)
 
+                self.detection_scheduler.reset()
+                self.detection_thread.reset_stats()
+                # a fresh gate rather than reset(): the decoder may still be finishing a frame with the old one
+                self.motion_gate = MotionGate(self.motion_gate.method, self.motion_gate.threshold)
+                if self.frame_reader is not None:
+                    self.frame_reader.set_motion_gate(self.motion_gate)
                 self.set_status_message("continuous_detection_on")
                 
                 if self.paused:
@@ -1294,7 +1684,12 @@ class VideoAnnotator(QMainWindow):
                         background-color: {'#2a82da' if is_dark else '#ccc'};
                     }}
                 """)
-                self.set_status_message("continuous_detection_off")
+                if self.frame_reader is not None:
+                    self.frame_reader.set_motion_gate(None)  # nothing to gate, saves a pass per decoded frame
+                stats = self.detection_scheduler.stats(self.detection_thread)
+                self.status_label.setText(f"{self.texts['continuous_detection_off']} - " +
+                                          self.texts["detection_coverage_format"].format(
+                                              stats["processed"], stats["played"], stats["coverage"] * 100))
                 
 
     def enable_manual_annotation(self):
@@ -1317,9 +1712,13 @@ class VideoAnnotator(QMainWindow):
                 self.sam2_refinement_btn = QPushButton(self.texts["segment_with_sam2"])
                 self.sam2_refinement_btn.clicked.connect(self.toggle_sam2_refinement)
                 self.statusBar().addWidget(self.sam2_refinement_btn)
+                self.sam2_propagate_btn = QPushButton(self.texts["sam2_propagate"])
+                self.sam2_propagate_btn.clicked.connect(self.propagate_sam2_mask)
+                self.statusBar().addWidget(self.sam2_propagate_btn)
             
             # Hide button initially, will show after first bbox is drawn
             self.sam2_refinement_btn.setVisible(False)
+            self.sam2_propagate_btn.setVisible(self.sam2_propagation is not None)
             
             # Verify class selection
             if not self.video_label.current_class:
@@ -1349,6 +1748,7 @@ class VideoAnnotator(QMainWindow):
             # Hide SAM 2 button when exiting manual mode
             if hasattr(self, 'sam2_refinement_btn') and self.sam2_refinement_btn:
                 self.sam2_refinement_btn.setVisible(False)
+                self.sam2_propagate_btn.setVisible(self.sam2_propagation is not None)
                 self.sam2_refinement_mode = False  # Reset SAM mode
                 self.sam2_refinement_btn.setStyleSheet("")  # Reset style
             
@@ -1390,28 +1790,13 @@ class VideoAnnotator(QMainWindow):
                 self.detections_dock.class_filter.addItem(name)
 
     def display_frame(self, frame):
+        """Shows a BGR frame or a composed pixmap, see VideoLabel.render_source"""
         try:
-            if isinstance(frame, np.ndarray):
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                #Smooth resizing
-                h, w = frame.shape[:2]
-                self.video_label._aspect_ratio = w / h
-                
-                #Create QImage directly from numpy array
-                bytes_per_line = 3 * w
-                q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(q_img)
-            else:
-                pixmap = frame
-            
             self.video_label.active_annotations = []
-            self.video_label.update()
-
-            self.video_label._pixmap = pixmap
-            self.update_video_display()
-            
-            if self.paused:
-                self.video_label.update()
+            if isinstance(frame, np.ndarray):
+                self.video_label.show_frame(frame)
+            elif frame is not None:
+                self.video_label.show_pixmap(frame)
                 
         except Exception as e:
             print(self.texts["frame_error"].format(traceback.format_exc()))
@@ -1419,35 +1804,7 @@ class VideoAnnotator(QMainWindow):
 
     def update_video_display(self):
         """Updates the video display while maintaining the aspect ratio"""
-        if not hasattr(self.video_label, '_pixmap') or self.video_label._pixmap is None:
-            return
-        
-        target_size = self.video_label.size()
-        if self.video_label._aspect_ratio is not None:
-            if target_size.width() / target_size.height() > self.video_label._aspect_ratio:
-                height = target_size.height()
-                width = int(height * self.video_label._aspect_ratio)
-            else:
-                width = target_size.width()
-                height = int(width / self.video_label._aspect_ratio)
-            target_size = QSize(width, height)
-        
-        scaled_pixmap = self.video_label._pixmap.scaled(
-            target_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        
-        self.video_label.video_x = (self.video_label.width() - scaled_pixmap.width()) // 2
-        self.video_label.video_y = (self.video_label.height() - scaled_pixmap.height()) // 2
-        self.video_label.video_rect = QRect(
-            self.video_label.video_x,
-            self.video_label.video_y,
-            scaled_pixmap.width(),
-            scaled_pixmap.height()
-        )
-        
-        self.video_label.setPixmap(scaled_pixmap)
+        self.video_label.render_source()
 
     def resizeEvent(self, event):
         """Redraws the frame when the window is resized"""
@@ -1515,20 +1872,6 @@ class VideoAnnotator(QMainWindow):
             
         new_pos = max(self.current_frame_num - 30, 0) # Calculate new position (30 frames back)
         self.set_current_frame(new_pos)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_pos) # Defines new position 
-        ret, frame = self.cap.read()
-        if ret:
-            # updates the number of the current frame 
-            self.current_frame_num = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        
-            # exhibits the frame 
-            self.display_frame(frame)
-            
-            # updates the progress bar 
-            self.update_progress_slider()
-            
-            # updates the time labels 
-            self.update_time_labels()
 
 
     def next_frame(self):
@@ -1543,29 +1886,11 @@ class VideoAnnotator(QMainWindow):
         # calculates new position (30 frames ->)
         new_pos = min(self.current_frame_num + 30, self.total_frames - 1)
         self.set_current_frame(new_pos)
-        
-        # defines the new position and reads the frame 
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_pos)
-        ret, frame = self.cap.read()
-        
-        if ret:
-            # updates the number of the current frame 
-            self.current_frame_num = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-            
-            # exhibits the frame
-            self.display_frame(frame)
-            
-            # updates the progress bar
-            self.update_progress_slider()
-            
-            # updates the time labels
-            self.update_time_labels()
                 
     def update_progress_slider(self):
-        """Updates the slider position"""
-        if self.total_frames > 0:
-            progress = int((self.current_frame_num / self.total_frames) * 100)
-            self.progress_slider.setValue(progress)            
+        """Updates the slider position (the slider range is in frames)"""
+        if self.total_frames > 0 and not self.progress_slider.isSliderDown():
+            self.progress_slider.setValue(self.current_frame_num)
 
     def seek_video(self, value):
         if self.live_mode:
@@ -1573,12 +1898,14 @@ class VideoAnnotator(QMainWindow):
         if self.cap is None:
             return
             
-        frame_pos = int((value / 100) * self.total_frames)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
+        frame_pos = min(max(value, 0), max(self.total_frames - 1, 0))
+        # while dragging only keyframes are shown, they decode without stepping forward
+        if self.progress_slider.isSliderDown() and self.keyframe_index is not None:
+            frame_pos = self.keyframe_index.nearest_keyframe(frame_pos)
+
         self.current_frame_num = frame_pos
-        self.update_frame()
-        ret, frame = self.cap.read()
-        if ret:
+        frame = self.read_frame_at(frame_pos)
+        if frame is not None:
             self.display_frame(frame)
         self.update_time_labels()
 
@@ -1588,6 +1915,9 @@ class VideoAnnotator(QMainWindow):
             self.toggle_play_pause()
 
     def resume_video_after_seeking(self):
+        # lands on the exact frame under the handle
+        if self.cap is not None and not self.live_mode:
+            self.set_current_frame(self.progress_slider.value())
         if self.was_playing:
             self.toggle_play_pause()
 
@@ -1600,8 +1930,7 @@ class VideoAnnotator(QMainWindow):
             self.total_time_label.setText("")
             return
             
-        current_frame = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-        current_time = self.get_video_timestamp(current_frame)
+        current_time = self.get_video_timestamp(self.current_frame_num)
         self.current_time_label.setText(current_time)
         
         if not hasattr(self, 'total_video_time'):
@@ -1621,16 +1950,7 @@ class VideoAnnotator(QMainWindow):
         if self.cap is None:
             return "00:00:00"
         
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        if fps <= 0:
-            return "00:00:00"
-        
-        total_seconds = frame_num / fps
-        hours = int(total_seconds // 3600)
-        minutes = int((total_seconds % 3600) // 60)
-        seconds = int(total_seconds % 60)
-    
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        return format_timestamp(frame_num, self.cap.get(cv2.CAP_PROP_FPS))
     
     def velocity2(self):
         """Aumenta a velocidade do vídeo"""
@@ -1651,16 +1971,14 @@ class VideoAnnotator(QMainWindow):
         else:
             # activates 2x velocity 
             self.velocity = True
-            self.frame_skip_counter = 0
             self.velocity2_button.setStyleSheet("background-color: #5c9eff;")
             fps = self.cap.get(cv2.CAP_PROP_FPS)
             
             # dif configs for continuous detection/non-continuous detection mode  
             if self.continuous_detection:
                 new_interval = int(1000 / (fps * 2))  
-                self.detection_every_n_frames = 2  
-                
-                self.set_status_message("speed_detection_format", "2.0", self.detection_every_n_frames)
+                # the scheduler sees the faster playback and widens its stride by itself
+                self.set_status_message("speed_detection_format", "2.0", self.detection_scheduler.stride)
             else:
                 # Normal mode without continuous detection - simply doubles the speed
                 new_interval = int(1000 / (fps * 2))
@@ -1753,13 +2071,9 @@ class VideoAnnotator(QMainWindow):
                             frame = cv2.imread(dataset_path)
                             break
                 elif self.cap and self.cap.isOpened():
-                    current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                    ret, frame = self.cap.read()
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
+                    frame = self.read_frame_at(frame_num)
                     
-                    if ret:
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    if frame is not None:
                         if video_name_prefix:
                             img_name = f"{video_name_prefix}_{frame_num:06d}.jpg"
                         else:
@@ -1828,6 +2142,7 @@ class VideoAnnotator(QMainWindow):
             
             # create dataset.yaml 
             yaml_path = os.path.join(output_dir, "dataset.yaml")
+            self.last_dataset_yaml = yaml_path
             with open(yaml_path, 'w') as f:
                 f.write(f"# YOLO Dataset Configuration\n\n")
                 out_path = os.path.abspath(output_dir).replace('\\', '/')
@@ -1868,7 +2183,7 @@ class VideoAnnotator(QMainWindow):
     def train_yolo_model(self):
         """Start training the YOLO model with manual annotations"""
         if not hasattr(self, 'all_detections'):
-            self.all_detections = []
+            self.all_detections = DetectionTable()
 
         for ann in self.video_label.active_annotations:
             if ann.get("type") == "manual" and ann not in self.all_detections:
@@ -2163,17 +2478,7 @@ class VideoAnnotator(QMainWindow):
                     unique_detections.append(d)
 
             # 7. Group by track_id, keeping highest confidence per tracked object
-            best_by_track = {}
-            for d in unique_detections:
-                tid = d.get("track_id")
-                if tid is not None:
-                    # For tracked objects, keep the highest confidence detection
-                    if tid not in best_by_track or d.get("confidence", 0) > best_by_track[tid].get("confidence", 0):
-                        best_by_track[tid] = d
-                else:
-                    # Keep all manual/untacked detections
-                    key = f"manual_{d.get('frame_number', 0)}_{id(d)}"
-                    best_by_track[key] = d
+            best_by_track = group_best_by_track(unique_detections)
 
             # 8. Extract and save frames 
             saved_frames = {}  # Cache: (video_path, frame_num) -> relative_path
@@ -2196,11 +2501,15 @@ class VideoAnnotator(QMainWindow):
 
                 # Determine frame save path
                 if video_path == "Live":
-                    # For Live mode: save current frame from memory
-                    if hasattr(self, 'current_frame') and self.current_frame is not None:
+                    # For Live mode: save the frame stored with the detection, or the current one
+                    frame_ref = ann.get("frame")
+                    live_frame = frame_ref.image() if isinstance(frame_ref, FrameRef) else None
+                    if live_frame is None:
+                        live_frame = getattr(self, 'current_frame', None)
+                    if live_frame is not None:
                         frame_name = f"live_frame_{frame_num or 0}.jpg"
                         frame_path = frames_dir / frame_name
-                        cv2.imwrite(str(frame_path), self.current_frame)
+                        cv2.imwrite(str(frame_path), live_frame)
                         saved_frames[frame_key] = str(frame_path)  
                     else:
                         saved_frames[frame_key] = "N/A"
@@ -2212,12 +2521,9 @@ class VideoAnnotator(QMainWindow):
                     
                     # Avoid re-extracting if frame already exists
                     if not frame_path.exists():
-                        cap = cv2.VideoCapture(str(video_path))
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-                        ret, frame = cap.read()
-                        if ret:
+                        frame = self.frame_provider.get_frame(video_path, frame_num)
+                        if frame is not None:
                             cv2.imwrite(str(frame_path), frame)
-                        cap.release()
                     
                     saved_frames[frame_key] = str(frame_path)  
 
@@ -2226,37 +2532,8 @@ class VideoAnnotator(QMainWindow):
 
             progress.close()
 
-            # 9. Prepare CSV data with frame paths
-            export_data = []
-            for ann in best_by_track.values():
-                video_path = ann.get("video_path", "")
-                video_name = "Live" if video_path == "Live" else os.path.basename(str(video_path)) if video_path else "Unknown"
-                
-                confidence = ann.get('confidence', 0)
-                confidence_str = f"{confidence:.2f}" if isinstance(confidence, (int, float)) else str(confidence)
-                
-                export_data.append({
-                    "Video": video_name, 
-                    "Timestamp": ann.get("timestamp", ""),
-                    "Taxon": ann.get("class", "Unknown"),
-                    "Confidence": confidence_str,
-                    "Type": ann.get("type", "unknown"),
-                    "Track_ID": ann.get("track_id", ""),
-                    "x1": ann.get("x1", ""),
-                    "y1": ann.get("y1", ""),
-                    "x2": ann.get("x2", ""),
-                    "y2": ann.get("y2", ""),
-                    "Frame_Number": ann.get("frame_number", ""),
-                    "Photo": ann.get("frame_path", "")
-                })
-
-            # 10. Save CSV file
-            with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ["Video", "Timestamp", "Taxon", "Confidence", "Type", "Track_ID",
-                            "x1", "y1", "x2", "y2", "Frame_Number", "Photo"]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(export_data)
+            # 9. Save CSV file with frame paths
+            write_csv(output_path, best_by_track.values())
 
             self.status_label.setText(self.texts["annotations_saved"].format(output_path))
             QMessageBox.information(
@@ -2282,10 +2559,9 @@ class VideoAnnotator(QMainWindow):
                 raise ValueError(self.texts["invalid_annotations"])
                 
             # clears existing annotations 
-            self.annotations = []
+            self.annotations.clear()
             self.video_label.manual_annotations = []
-            self.detections_dock.all_detections = []
-            self.detections_dock.detections_list.clear()
+            self.detections_dock.all_detections.clear()
             
             # loads custom classes
             if 'custom_classes' in data:
@@ -2320,7 +2596,7 @@ class VideoAnnotator(QMainWindow):
             
             # If a video is loaded, display the annotations on the current frame
             if self.cap is not None and self.cap.isOpened():
-                self.display_frame(self.video_label._pixmap)
+                self.display_frame(self.video_label.source())
                 
             self.detections_dock.apply_filters()
                 
@@ -2330,14 +2606,13 @@ class VideoAnnotator(QMainWindow):
             print(self.texts["debug_load_annotations_error"].format(traceback.format_exc()))
 
     def save_current_frame_with_annotations(self):
-        # Make sure we have something on screen
-        if not hasattr(self.video_label, '_pixmap') or self.video_label._pixmap is None:
+        # Start from the pixmap already shown (includes YOLO auto-boxes)
+        pixmap = self.video_label.displayed_pixmap()
+        if pixmap is None:
+            # Make sure we have something on screen
             self.status_label.setText(self.texts["no_frame_to_save"])
             return
 
-        # Start from the pixmap already shown (includes YOLO auto-boxes)
-        pixmap = self.video_label._pixmap.copy()
-
         painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
@@ -2409,6 +2684,7 @@ class VideoAnnotator(QMainWindow):
             f"D: {self.texts['detect_frame']}",
             f"T: {self.texts['toggle_detection']}",
             f"M: {self.texts['annotate_manual']}",
+            f"Ctrl+Z: {self.texts['sam2_undo_point']}",
             f"Ctrl+O: {self.texts['load_video']}",
             f"Ctrl+M: {self.texts['load_model']}",
             f"Ctrl+W: {self.texts['live']}",
@@ -2438,24 +2714,27 @@ class VideoAnnotator(QMainWindow):
         if self.cap is None or self.live_mode:
             return
 
+        if self.sam2_refinement_mode and frame_num != self.current_frame_num:
+            # the refinement box and clicks belong to the frame being left
+            self.toggle_sam2_refinement()
         self.current_frame_num = frame_num
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
 
         self.video_label.current_frame_num = frame_num
         self.video_label.update_active_annotations()
 
-        ret, frame = self.cap.read()
-        if ret:
+        frame = self.read_frame_at(frame_num)
+        if frame is not None:
             self.display_frame(frame)
             self.update_progress_slider()
             self.update_time_labels()
+        self.sync_frame_reader()
 
     def add_manual_annotation_to_history(self, annotation):
         if not hasattr(self, 'all_detections'):
-            self.all_detections = []
+            self.all_detections = DetectionTable()
         
         annotation["frame_number"] = self.current_frame_num
-        annotation["frame"] = self.capture_current_frame()
+        annotation["frame"] = self.frame_store.add(self.read_current_frame())
         
         self.all_detections.append(annotation)
         self.detections_dock.add_detection(annotation)
@@ -2616,8 +2895,8 @@ class VideoAnnotator(QMainWindow):
             self.current_frame_num = 0
             self.total_frames = len(self.dataset_frames)
             self.paused = True
-            self.annotations = []
-            self.detections_dock.all_detections = []
+            self.annotations.clear()
+            self.detections_dock.all_detections.clear()
             self.detections_dock.apply_filters()
             self.dataset_mode = True
             self.dataset_index = 0
@@ -2698,60 +2977,89 @@ class VideoAnnotator(QMainWindow):
         
         return background_count
     
-    def init_sam2(self):
-        """Initialize SAM 2 model and thread"""
-        try:
-            self.sam2_thread = SAM2Thread("sam2.1_b.pt", self)
-            self.sam2_thread.mask_finished.connect(self.on_sam2_mask_finished)
-            self.sam2_thread.error.connect(self.on_sam2_error)
-            self.sam2_thread.start()
-        except Exception as e:
-            self.status_label.setText("SAM 2 initialization failed")
+    def ensure_sam2(self):
+        """SAM 2 thread, created (and its model loaded in the background) on first use"""
+        if self.sam2_thread is None:
+            try:
+                self.sam2_thread = SAM2Thread("sam2.1_b.pt", self)
+                self.sam2_thread.mask_finished.connect(self.on_sam2_mask_finished)
+                self.sam2_thread.error.connect(self.on_sam2_error)
+                self.sam2_thread.model_loading.connect(lambda: self.set_sam_state("loading"))
+                self.sam2_thread.model_ready.connect(lambda device: self.set_sam_state("ready"))
+                self.sam2_thread.start()
+            except Exception as e:
+                self.status_label.setText("SAM 2 initialization failed")
+        return self.sam2_thread
+
+    def set_sam_state(self, state):
+        self.sam_state = state
+        self.update_model_status()
+
+    def segmentation_from_mask(self, mask, frame_num, confidence):
+        """Segmentation annotation (polygon + compact mask) of a binary or CompactMask mask, None if it has no contour"""
+        if not isinstance(mask, CompactMask):
+            mask = CompactMask.from_mask(mask)
+        # every component (holes bridged in) as one polygon normalised to [0,1] for YOLO format
+        normalized_coords, components = mask_to_yolo_polygon(
+            mask, self.polygon_tolerance, self.polygon_max_vertices)
+        if normalized_coords is None:
+            return None
+
+        h, w = mask.shape
+        return {
+            "type": "segmentation",  # NEW type
+            "class": self.video_label.current_class,
+            "confidence": confidence,
+            "frame_number": frame_num,
+            "timestamp": self.get_video_timestamp(frame_num),
+            "video_path": self.video_path or "Live",
+            "mask": mask,  # CompactMask, decoded only to draw or export
+            "polygon": normalized_coords,  # ** YOLO segmentation format **
+            "components": components,
+            "frame_source": (self.video_path, frame_num),
+            "frame_dimensions": f"{w}x{h}"
+        }
 
     def on_sam2_mask_finished(self, mask_data, original_frame, frame_num):
         """Store SAM mask as segmentation-ready annotation"""
+        request_id = mask_data.get("request_id") if mask_data else None
+        if request_id is not None and not self.sam2_thread.is_latest(request_id):
+            # queued before a newer click: showing it would flicker back to an older mask
+            self.sam2_thread.superseded_requests += 1
+            return
         try:
             if mask_data and mask_data["segmentation"] is not None:
-                
-                mask = mask_data["segmentation"]
-                
-                # Extract polygon contours from mask
-                contours = measure.find_contours(mask, 0.5)  # 0.5 threshold
-                if not contours:
+                confidence = float(mask_data["scores"][0]) if mask_data.get("scores") else 0.95
+                seg_annotation = self.segmentation_from_mask(
+                    mask_data.get("compact") or mask_data["segmentation"], frame_num, confidence)
+                if seg_annotation is None:
                     self.status_label.setText("No valid contours found")
                     return
                 
-                # Use largest contour (main object)
-                main_contour = max(contours, key=lambda c: len(c))
-                
-                # Normalize coordinates to [0,1] for YOLO format
-                h, w = mask.shape[:2]
-                normalized_coords = [(y/w, x/h) for x, y in main_contour]
-                
-                # Create segmentation annotation (NEW format)
-                seg_annotation = {
-                    "type": "segmentation",  # NEW type
-                    "class": self.video_label.current_class,
-                    "confidence": float(mask_data["scores"][0]) if mask_data.get("scores") else 0.95,
-                    "frame_number": frame_num,
-                    "timestamp": self.get_video_timestamp(frame_num),
-                    "video_path": self.video_path or "Live",
-                    "mask": mask,  # Keep binary mask for visualization
-                    "polygon": normalized_coords,  # ** YOLO segmentation format **
-                    "frame_source": (self.video_path, frame_num),
-                    "frame_dimensions": f"{original_frame.shape[1]}x{original_frame.shape[0]}"
-                }
-                
                 # Store in segmentation-specific storage
                 if not hasattr(self, 'segmentation_annotations'):
                     self.segmentation_annotations = []
+
+                # a further click of the same session replaces the mask instead of adding another one
+                session_id = mask_data.get("session_id")
+                if self._sam2_session_annotation and self._sam2_session_annotation[0] == session_id:
+                    previous = self._sam2_session_annotation[1]
+                    self.segmentation_annotations = [ann for ann in self.segmentation_annotations
+                                                     if ann is not previous]
+                    self.detections_dock.remove_detection(previous)
+                self._sam2_session_annotation = (session_id, seg_annotation)
                 self.segmentation_annotations.append(seg_annotation)
                 
                 # Also add to detections dock for visualization
                 self.detections_dock.add_detection(seg_annotation)
+
+                # prompts the propagation starts from
+                self._sam2_last_prompts = (frame_num, mask_data.get("box"), mask_data.get("points", []))
+                if self.video_path and not self.live_mode and not getattr(self, 'dataset_mode', False):
+                    self.sam2_propagate_btn.setVisible(True)
                 
                 self.status_label.setText(
-                    self.texts["sam2_segmentation_created"].format(len(normalized_coords))
+                    self.texts["sam2_segmentation_created"].format(len(seg_annotation["polygon"]))
                 )
                 
                 # Draw mask on frame
@@ -2760,32 +3068,105 @@ class VideoAnnotator(QMainWindow):
         except Exception as e:
             self.on_sam2_error(str(e))
 
+    def propagate_sam2_mask(self):
+        """Tracks the refined mask over the neighbouring frames, or cancels a running propagation"""
+        if self.sam2_propagation is not None:
+            self.sam2_propagation.cancel()
+            return
+        if self._sam2_last_prompts is None or not self.video_path:
+            return
+        frame_num, box, points = self._sam2_last_prompts
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(self.texts["sam2_propagate"])
+        form_layout = QFormLayout(dialog)
+
+        before_spin = QSpinBox()
+        before_spin.setRange(0, 100000)
+        before_spin.setValue(self.sam2_propagation_frames[0])
+        form_layout.addRow(self.texts["sam2_frames_before"], before_spin)
+
+        after_spin = QSpinBox()
+        after_spin.setRange(0, 100000)
+        after_spin.setValue(self.sam2_propagation_frames[1])
+        form_layout.addRow(self.texts["sam2_frames_after"], after_spin)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.accepted.connect(dialog.accept)
+        button_box.rejected.connect(dialog.reject)
+        form_layout.addWidget(button_box)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        self.sam2_propagation_frames = (before_spin.value(), after_spin.value())
+
+        self.sam2_propagation = SAM2PropagationThread(
+            self.video_path, frame_num, box, points,
+            frames_before=before_spin.value(), frames_after=after_spin.value(), parent=self)
+        self.sam2_propagation.mask_ready.connect(self.on_propagated_mask)
+        self.sam2_propagation.progress.connect(
+            lambda done, total: self.set_status_message("sam2_propagation_progress", done, total))
+        self.sam2_propagation.error.connect(self.on_sam2_error)
+        self.sam2_propagation.finished_propagation.connect(self.on_propagation_finished)
+        self.sam2_propagate_btn.setText(self.texts["sam2_cancel_propagation"])
+        self.set_status_message("sam2_propagation_started")
+        self.sam2_propagation.start()
+
+    def on_propagated_mask(self, frame_num, mask, score):
+        if self.sender() is not self.sam2_propagation:
+            return  # a cancelled run still delivering queued results
+        seg_annotation = self.segmentation_from_mask(mask, frame_num, score)
+        if seg_annotation is None:
+            return
+        seg_annotation["propagated"] = True
+        if not hasattr(self, 'segmentation_annotations'):
+            self.segmentation_annotations = []
+        self.segmentation_annotations.append(seg_annotation)
+        self.detections_dock.add_detection(seg_annotation)
+
+    def on_propagation_finished(self, count):
+        if self.sender() is not self.sam2_propagation:
+            return
+        self.sam2_propagation = None
+        self.sam2_propagate_btn.setText(self.texts["sam2_propagate"])
+        self.set_status_message("sam2_propagation_done", count)
+
     def on_sam2_error(self, error_msg):
         """Handle SAM 2 errors"""
+        if self.sam2_thread is not None and self.sam2_thread.model is None:
+            self.set_sam_state("error")
         self.status_label.setText(self.texts["sam2_error"].format(error_msg))
 
     def redraw_frame_with_mask(self, mask_data, original_frame):
         try:
-            mask = mask_data["segmentation"]
+            mask = mask_data.get("compact")
+            if mask is None:
+                mask = mask_data["segmentation"]
             if mask is None or mask.shape[:2] != original_frame.shape[:2]:
                 return
-                
-            # Cria overlay colorido para a máscara
-            overlay = original_frame.copy()
-            overlay[mask > 0.5] = [0, 255, 0]  # Máscara verde
-            
-            # Mistura original com overlay
-            alpha = 0.4
-            blended = cv2.addWeighted(original_frame, 1-alpha, overlay, alpha, 0)
-            
-            # IMPORTANTE: Mantém a bounding box original visível
+
+            # the frame of a session is converted once, further clicks only redraw the mask ROIs
+            frame_num = self.current_frame_num
+            self.overlay_compositor.set_frame(original_frame, key=(mask_data.get("session_id"), frame_num))
+
+            # other segmentations of this frame stay visible in their own colours
+            session_annotation = self._sam2_session_annotation[1] if self._sam2_session_annotation else None
+            masks = [(ann["mask"], None) for ann in getattr(self, 'segmentation_annotations', [])
+                     if ann is not session_annotation and ann.get("frame_number") == frame_num
+                     and ann.get("video_path") == (self.video_path or "Live")]
+            masks.append((mask, (0, 255, 0)))  # Máscara verde
+
+            # IMPORTANTE: Mantém a bounding box original visível (azul)
+            boxes = []
             if hasattr(self, 'current_bb_for_refinement') and self.current_bb_for_refinement:
                 bb = self.current_bb_for_refinement
-                # Desenha bbox em azul para mostrar que está sendo refinada
-                cv2.rectangle(blended, (bb["x1"], bb["y1"]), (bb["x2"], bb["y2"]), 
-                            (255, 0, 0), 2)  # Bbox azul
-            
-            self.display_frame(blended)
+                boxes.append(((bb["x1"], bb["y1"], bb["x2"], bb["y2"]), (0, 0, 255)))
+
+            # session clicks: green foreground, red background
+            points = [((x, y), (0, 255, 0) if label else (255, 0, 0))
+                      for x, y, label in mask_data.get("points", [])]
+
+            self.display_frame(self.overlay_compositor.compose(masks, boxes, points))
             
         except Exception as e:
             print(f"Error drawing mask: {e}")
@@ -2811,23 +3192,34 @@ class VideoAnnotator(QMainWindow):
         if self.sam2_refinement_mode:
             # **Activate SAM **
             self.sam2_refinement_btn.setStyleSheet("background-color: #ff9500; color: white; font-weight: bold;")
-            self.set_status_message("sam2_refinement_on")
+            self.status_label.setText(f"{self.texts['sam2_refinement_on']} - {self.texts['sam2_refinement_hint']}")
             
-            # ** Create points from bbox for SAM **
+            # ** New session from the bbox, clicks are added to it **
             bb = self.current_bb_for_refinement
-            sam_box = np.array([[bb["x1"], bb["y1"], bb["x2"], bb["y2"]]], dtype=np.float32)
+            sam_box = np.array([bb["x1"], bb["y1"], bb["x2"], bb["y2"]], dtype=np.float32)
             
             # ** Send to SAM thread **
             sam_frame = self._get_frame_for_sam()
-            if sam_frame is not None:
-                self.sam2_thread.set_frame_and_prompts(sam_frame, self.current_frame_num, sam_box)
+            if sam_frame is not None and self.ensure_sam2() is not None:
+                self.sam2_thread.start_session(sam_frame, self.current_frame_num, sam_box)
         else:
             # Deactivate SAM
             self.current_bb_for_refinement = None
+            self._sam2_session_annotation = None
+            self._sam2_last_prompts = None
+            if self.sam2_propagation is None:
+                self.sam2_propagate_btn.setVisible(False)
+            if self.sam2_thread is not None:
+                self.sam2_thread.reset_session()
             self.sam2_refinement_btn.setStyleSheet("")
             self.set_status_message("sam2_refinement_off")
 
 
+    def undo_sam2_point(self):
+        """Removes the last click of the refinement session"""
+        if self.sam2_refinement_mode and self.sam2_thread is not None and self.sam2_thread.undo_point():
+            self.set_status_message("sam2_point_undone")
+
     def _get_frame_for_sam(self):
         # Priority 1: Use stored current_frame
         if hasattr(self, 'current_frame') and self.current_frame is not None:
@@ -2853,11 +3245,7 @@ class VideoAnnotator(QMainWindow):
         
         # Priority 3: Video mode fallback
         elif hasattr(self, 'cap') and self.cap is not None and self.cap.isOpened():
-            current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-            ret, frame = self.cap.read()
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
-            if ret:
-                return frame
+            return self.read_current_frame()
 
 
         return None
@@ -2948,12 +3336,7 @@ class VideoAnnotator(QMainWindow):
         if self.cap is None:
             return None
         
-        current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-        ret, frame = self.cap.read()
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
-        
-        return frame if ret else None
+        return self.read_frame_at(frame_num)
     
     def export_segmentation_dialog(self):
         output_dir = QFileDialog.getExistingDirectory(
@@ -3017,6 +3400,21 @@ class VideoAnnotator(QMainWindow):
 
     def closeEvent(self, event):
         """Safely stop all threads before closing"""
+        self.stop_frame_reader()
+        self.stop_keyframe_index()
+        self.frame_provider.release()
+        self.frame_store.clear()
+
+        # a model still loading cannot be interrupted, waits for it
+        for loader in self.findChildren(ModelLoaderThread):
+            loader.wait()
+        for exporter in self.findChildren(ModelExportThread):
+            exporter.wait()
+
+        if self.sam2_propagation is not None:
+            self.sam2_propagation.cancel()
+            self.sam2_propagation.wait(5000)
+
         # Stop SAM2 thread
         if hasattr(self, 'sam2_thread') and self.sam2_thread is not None:
             self.sam2_thread.stop()
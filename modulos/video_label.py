@@ -1,6 +1,7 @@
 import cv2
+import numpy as np
 from PyQt6.QtCore import Qt, QPointF, QRect
-from PyQt6.QtGui import QPainter, QPen, QColor
+from PyQt6.QtGui import QPainter, QPen, QColor, QImage, QPixmap
 from PyQt6.QtWidgets import QLabel, QSizePolicy
 
 class VideoLabel(QLabel):
@@ -37,39 +38,79 @@ class VideoLabel(QLabel):
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self._aspect_ratio = None
         self.video_rect = None
-        self._pixmap = None
+
+        # render path: the source is scaled once to the display size and cached until it or the widget changes
+        self._source = None        # BGR frame or full-resolution QPixmap being shown
+        self._frame_image = None   # what paintEvent draws: QImage over _rgb, or a scaled QPixmap
+        self._scaled_bgr = None    # reused buffers at display size
+        self._rgb = None
+        self._rgb_image = None
         
         # Hover detection
         self.hovered_annotation = None
 
-    def setPixmap(self, pixmap):
-        """Stores the original pixmap and updates the display"""
-        self._pixmap = pixmap
-        self.update_display()
-
-    def update_display(self):
-        """Updates the display of the resized video"""
-        if self._pixmap is None:
+    def show_frame(self, frame):
+        """Shows a BGR frame. The array must stay valid while shown (it is re-rendered on resize)"""
+        self._source = frame
+        h, w = frame.shape[:2]
+        self._aspect_ratio = w / h
+        self.render_source()
+
+    def show_pixmap(self, pixmap):
+        """Shows an already composed pixmap at frame resolution (overlays, plotted detections)"""
+        self._source = pixmap
+        self._aspect_ratio = pixmap.width() / pixmap.height() if pixmap.height() else None
+        self.render_source()
+
+    def source(self):
+        return self._source
+
+    def displayed_pixmap(self):
+        """Copy of the frame as shown, at display size"""
+        if isinstance(self._frame_image, QImage):
+            return QPixmap.fromImage(self._frame_image)
+        return self._frame_image.copy() if self._frame_image is not None else None
+
+    def fitted_rect(self):
+        """Centered rectangle of the widget with the aspect ratio of the source"""
+        width, height = self.width(), self.height()
+        if self._aspect_ratio:
+            if width / max(height, 1) > self._aspect_ratio:
+                width = int(height * self._aspect_ratio)
+            else:
+                height = int(width / self._aspect_ratio)
+        width, height = max(width, 1), max(height, 1)
+        return QRect((self.width() - width) // 2, (self.height() - height) // 2, width, height)
+
+    def render_source(self):
+        """The only scaling step: source to display size, into buffers reused between frames"""
+        if self._source is None:
             return
-            
-        # Resize while maintaining aspect ratio
-        scaled_pixmap = self._pixmap.scaled(
-            self.size(), 
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        
-        # Calculates the position to center
-        self.video_x = (self.width() - scaled_pixmap.width()) // 2
-        self.video_y = (self.height() - scaled_pixmap.height()) // 2
-        self.video_rect = QRect(self.video_x, self.video_y, 
-                              scaled_pixmap.width(), scaled_pixmap.height())
-        
-        super().setPixmap(scaled_pixmap)
+        rect = self.fitted_rect()
+        width, height = rect.width(), rect.height()
+
+        if isinstance(self._source, np.ndarray):
+            if self._rgb is None or self._rgb.shape[:2] != (height, width):
+                self._scaled_bgr = np.empty((height, width, 3), dtype=np.uint8)
+                self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+                self._rgb_image = QImage(self._rgb.data, width, height, 3 * width, QImage.Format.Format_RGB888)
+            frame = self._source
+            if frame.shape[:2] != (height, width):
+                interpolation = cv2.INTER_AREA if frame.shape[1] > width else cv2.INTER_LINEAR
+                frame = cv2.resize(frame, (width, height), dst=self._scaled_bgr, interpolation=interpolation)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            self._frame_image = self._rgb_image
+        else:
+            self._frame_image = self._source.scaled(
+                rect.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+        self.video_x, self.video_y = rect.x(), rect.y()
+        self.video_rect = rect
+        self.update()
 
     def resizeEvent(self, event):
         """Resizes the video when the widget changes size"""
-        self.update_display()
+        self.render_source()
         super().resizeEvent(event)
 
     def set_video_rect(self, rect):
@@ -94,36 +135,22 @@ class VideoLabel(QLabel):
         if not video_rect.contains(pos):
             return
 
+        main_win = self.window()
+        sam2_mode = getattr(main_win, 'sam2_refinement_mode', False)
+        if event.button() == Qt.MouseButton.RightButton and sam2_mode:
+            # right click adds a background point, never starts anything else while refining
+            self._add_sam2_point(main_win, pos, 0)
+            return
+
         if event.button() == Qt.MouseButton.LeftButton:
-            main_win = self.window()
-            
             # SAM 2 mode active
-            if hasattr(main_win, 'sam2_refinement_mode') and main_win.sam2_refinement_mode:
-                frame_coords = self.get_frame_coordinates(pos)
-                if frame_coords:
-                    x, y = frame_coords
-                    
-                    # Check if click is inside the SAM refinement bbox
-                    if hasattr(main_win, 'current_bb_for_refinement') and main_win.current_bb_for_refinement:
-                        bb = main_win.current_bb_for_refinement
-                        if bb["x1"] <= x <= bb["x2"] and bb["y1"] <= y <= bb["y2"]:
-                            # Click INSIDE → process SAM 2
-                            if hasattr(main_win, 'sam2_thread'):
-                                prompts = [(x, y, 1)]
-                                frame = self._get_frame_for_sam(main_win)
-                                if frame is not None:
-                                    main_win.sam2_thread.set_frame_and_prompts(
-                                        frame, main_win.current_frame_num, prompts
-                                    )
-                                    return  # Block drawing new bbox
-                        else:
-                            # Click OUTSIDE → auto-disable SAM 2
-                            main_win.toggle_sam2_refinement()
-                            # Continue to draw new bbox below
-                    else:
-                        # No bbox stored → auto-disable SAM 2
-                        main_win.toggle_sam2_refinement()
-                        # Continue to draw new bbox
+            if sam2_mode:
+                shift = event.modifiers() & Qt.KeyboardModifier.ShiftModifier
+                if self._add_sam2_point(main_win, pos, 0 if shift else 1):
+                    return  # Block drawing new bbox
+                # Click OUTSIDE the bbox (or no bbox stored) → auto-disable SAM 2
+                main_win.toggle_sam2_refinement()
+                # Continue to draw new bbox below
             
             if event.button() == Qt.MouseButton.LeftButton:
                 for ann in self.active_annotations:
@@ -144,16 +171,26 @@ class VideoLabel(QLabel):
             if event.button() == Qt.MouseButton.RightButton:
                 self.delete_annotation_at(pos, video_rect) 
 
+    def _add_sam2_point(self, main_win, pos, label):
+        """Adds a click inside the refinement bbox to the SAM 2 session. False if it is outside"""
+        frame_coords = self.get_frame_coordinates(pos)
+        bb = getattr(main_win, 'current_bb_for_refinement', None)
+        if not frame_coords or not bb:
+            return False
+        x, y = frame_coords
+        if not (bb["x1"] <= x <= bb["x2"] and bb["y1"] <= y <= bb["y2"]):
+            return False
+        frame = self._get_frame_for_sam(main_win)
+        if frame is not None and main_win.ensure_sam2() is not None:
+            main_win.sam2_thread.add_point(frame, main_win.current_frame_num, x, y, label)
+        return True
+
     def _get_frame_for_sam(self, main_win):
         """Helper to get current frame for SAM"""
         if hasattr(main_win, 'current_frame') and main_win.current_frame is not None:
             return main_win.current_frame
-        elif hasattr(main_win, 'cap') and main_win.cap is not None:
-            current_pos = main_win.cap.get(cv2.CAP_PROP_POS_FRAMES)
-            ret, frame = main_win.cap.read()
-            main_win.cap.set(cv2.CAP_PROP_POS_FRAMES, current_pos)
-            if ret:
-                return frame
+        elif hasattr(main_win, 'read_current_frame'):
+            return main_win.read_current_frame()
         return None   
 
     def mouseMoveEvent(self, event):
@@ -295,6 +332,11 @@ class VideoLabel(QLabel):
         super().paintEvent(event)
         
         painter = QPainter(self)
+        if self._frame_image is not None and self.video_rect is not None:
+            if isinstance(self._frame_image, QImage):
+                painter.drawImage(self.video_rect.topLeft(), self._frame_image)
+            else:
+                painter.drawPixmap(self.video_rect.topLeft(), self._frame_image)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
         video_rect = self.get_video_rect()